@@ -0,0 +1,154 @@
+'''
+Created on 20261018
+@author: agent
+'''
+import numpy as np
+from math import comb, factorial
+
+
+# Max number of valid blocks (pairs of input/output aggregates) checked during the search of components
+MAX_NB_BLOCKS = 2**14
+
+
+def find_components(in_sums, out_sums, fees, max_nb_blocks=MAX_NB_BLOCKS):
+    '''
+    Splits a transaction into independent components
+    A valid block is a pair (input aggregate, output aggregate) such that 0 <= in_val - out_val <= fees.
+    A split of a component into 2 sub-components is accepted if the restrictions of all valid blocks of the component
+    to each sub-component verify in_val - out_val >= 0. Then, each valid block of the component
+    is the union of valid blocks of the sub-components and each combination of the component
+    is a merge of combinations of the sub-components (@see merge_nb_blocks).
+    Returns a list of tuples (input aggregate, output aggregate) storing the components
+    or None if the transaction has too many valid blocks
+    Parameters:
+        in_sums       = array of values of all input aggregates (indexed by aggregate)
+        out_sums      = array of values of all output aggregates (indexed by aggregate)
+        fees          = fees of the transaction
+        max_nb_blocks = max number of valid blocks
+    '''
+    itgt = len(in_sums) - 1
+    otgt = len(out_sums) - 1
+
+    # Finds all valid blocks (output aggregates sorted by value + range of output aggregates matching each input aggregate)
+    out_order = np.argsort(out_sums, kind='stable')
+    lo = np.searchsorted(out_sums[out_order], in_sums - fees, side='left')
+    hi = np.searchsorted(out_sums[out_order], in_sums, side='right')
+    counts = hi - lo
+    counts[0] = 0
+    nb_blocks = int(counts.sum())
+    if nb_blocks > max_nb_blocks:
+        return None
+    blk_in = np.repeat(np.arange(len(in_sums), dtype=np.int64), counts)
+    starts = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+    blk_out = out_order[starts + np.arange(nb_blocks)].astype(np.int64)
+
+    # Candidate sub-components are valid blocks with outputs whose complementary aggregates store inputs and outputs
+    # (smallest candidates first)
+    is_cand = (blk_in != itgt) & (blk_out != 0) & (blk_out != otgt)
+    cand_in = blk_in[is_cand]
+    cand_out = blk_out[is_cand]
+    size = _get_nb_bits(len(in_sums))[cand_in] + _get_nb_bits(len(out_sums))[cand_out]
+    order = np.argsort(size, kind='stable')
+    candidates = list(zip(cand_in[order].tolist(), cand_out[order].tolist()))
+
+    components = [(itgt, otgt)]
+    split = True
+    while split:
+        split = False
+        for (a, x) in candidates:
+            for k, (gi, go) in enumerate(components):
+                if (a & gi != a) or (x & go != x):
+                    continue
+                if (a != gi) and (x != go):
+                    # Checks the restrictions of the valid blocks of the component
+                    in_cpnt = ((blk_in & ~gi) == 0) & ((blk_out & ~go) == 0)
+                    bi = blk_in[in_cpnt]
+                    bo = blk_out[in_cpnt]
+                    if np.all(in_sums[bi & a] >= out_sums[bo & x]) and\
+                       np.all(in_sums[bi & (gi - a)] >= out_sums[bo & (go - x)]):
+                        components[k:k+1] = [(a, x), (gi - a, go - x)]
+                        split = True
+                break
+
+    return components
+
+
+def merge_nb_blocks(nb_cmbn1, nb_cmbn2):
+    '''
+    Computes the number of combinations of the union of 2 independent components
+    Each combination of the union is defined by a combination of each component
+    and a set of pairs (block1, block2) of blocks merged together.
+    Returns a list storing the number of combinations made of k blocks (index k)
+    Parameters:
+        nb_cmbn1 = list storing the number of combinations of the first component made of k blocks (index k)
+        nb_cmbn2 = list storing the number of combinations of the second component made of k blocks (index k)
+    '''
+    res = [0] * (len(nb_cmbn1) + len(nb_cmbn2) - 1)
+    for s, n1 in enumerate(nb_cmbn1):
+        if n1 == 0:
+            continue
+        for t, n2 in enumerate(nb_cmbn2):
+            if n2 == 0:
+                continue
+            for j in range(0, min(s, t) + 1):
+                res[s+t-j] += n1 * n2 * comb(s, j) * comb(t, j) * factorial(j)
+    return res
+
+
+def count_merges(nb_blocks1, nb_blocks2):
+    '''
+    Computes the number of ways to merge the blocks of 2 combinations of independent components
+    (sets of pairs of merged blocks)
+    Parameters:
+        nb_blocks1 = number of blocks of the first combination
+        nb_blocks2 = number of blocks of the second combination
+    '''
+    return sum([comb(nb_blocks1, j) * comb(nb_blocks2, j) * factorial(j) for j in range(0, min(nb_blocks1, nb_blocks2) + 1)])
+
+
+def count_completions(nb_blocks, nb_cmbn_rest):
+    '''
+    Computes the number of combinations of a transaction extending a given combination of one of its components
+    Parameters:
+        nb_blocks    = number of blocks of the combination of the component
+        nb_cmbn_rest = list storing the number of combinations of the union of other components made of k blocks (index k)
+    '''
+    return sum([n * count_merges(nb_blocks, t) for t, n in enumerate(nb_cmbn_rest) if n > 0])
+
+
+def count_linked(nb_cmbn1, nb_cmbn2, nb_cmbn_rest):
+    '''
+    Computes the number of combinations of a transaction for which a txo of a component
+    and a txo of another component are linked (blocks storing the 2 txos are merged)
+    Parameters:
+        nb_cmbn1     = list storing the number of combinations of the first component made of k blocks (index k)
+        nb_cmbn2     = list storing the number of combinations of the second component made of k blocks (index k)
+        nb_cmbn_rest = list storing the number of combinations of the union of other components made of k blocks (index k)
+    '''
+    nb_linked = 0
+    for s, n1 in enumerate(nb_cmbn1):
+        if n1 == 0:
+            continue
+        for t, n2 in enumerate(nb_cmbn2):
+            if n2 == 0:
+                continue
+            # Blocks storing the 2 txos are merged together + (j-1) other pairs of blocks
+            for j in range(1, min(s, t) + 1):
+                nb_merges = comb(s-1, j-1) * comb(t-1, j-1) * factorial(j-1)
+                nb_linked += n1 * n2 * nb_merges * count_completions(s+t-j, nb_cmbn_rest)
+    return nb_linked
+
+
+def _get_nb_bits(nb_aggs):
+    '''
+    Computes the number of txos stored in each aggregate
+    Returns an array indexed by aggregate
+    Parameters:
+        nb_aggs = number of aggregates (power of 2)
+    '''
+    nb_bits = np.zeros(nb_aggs, dtype=np.int64)
+    k = 1
+    while k < nb_aggs:
+        nb_bits[k:2*k] = nb_bits[:k] + 1
+        k *= 2
+    return nb_bits
@@ -0,0 +1,204 @@
+'''
+Created on 20261018
+@author: agent
+'''
+import numpy as np
+
+
+'''
+Frames of the depth-first traversal (@see TxosLinker._run_dfs)
+
+A frame stores the output combinations matching the input combination of a task.
+Each entry of the frame is a pair of output aggregates (o_r, o_l) associated to
+a number of parent combinations (nb_prt). Entries sharing a same o_r form a group.
+The back-propagation of a child task adds the same number of child combinations
+to all the entries of a group, so numbers of child combinations (nb_chld) are stored by group.
+
+Most frames are small. They're stored in python dictionaries (DfsFrame).
+Wide frames are stored in numpy arrays (DfsArrayFrame), processed with vectorized operations.
+'''
+
+# Min number of entries of a frame stored in numpy arrays
+MIN_ARRAY_FRAME_SIZE = 512
+
+
+def new_frame(o_rs, o_ls, nb_prts):
+    '''
+    Builds a frame from arrays of entries
+    Returns a DfsArrayFrame if the frame is wide, a DfsFrame otherwise
+    Parameters:
+        o_rs    = 1D array of right output aggregates
+        o_ls    = 1D array of left output aggregates
+        nb_prts = 1D array of numbers of parent combinations
+    '''
+    if len(o_rs) >= MIN_ARRAY_FRAME_SIZE:
+        return DfsArrayFrame(o_rs, o_ls, nb_prts)
+    groups = {}
+    for (o_r, o_l, nb_prt) in zip(o_rs.tolist(), o_ls.tolist(), nb_prts.tolist()):
+        grp = groups.get(o_r)
+        if grp is None:
+            grp = groups[o_r] = [0, 0, {}]
+        grp[0] += nb_prt
+        grp[2][o_l] = nb_prt
+    return DfsFrame(groups)
+
+
+class DfsFrame(object):
+    '''
+    A class storing a frame in python dictionaries
+    Attributes:
+        groups (dict): { o_r => [sum of nb_prt of the group, nb_chld, { o_l => nb_prt }] }
+    '''
+
+    __slots__ = ('groups',)
+
+    def __init__(self, groups):
+        '''
+        Constructor
+        Parameters:
+            groups = dictionary { o_r => [sum of nb_prt of the group, nb_chld, { o_l => nb_prt }] }
+        '''
+        self.groups = groups
+
+    def get_groups(self):
+        '''
+        Returns the groups of the frame as a tuple of lists (o_rs, sums of nb_prt)
+        '''
+        return list(self.groups.keys()), [grp[0] for grp in self.groups.values()]
+
+    def get_nb_chld(self, o_r):
+        '''
+        Returns the number of child combinations of a group
+        Parameters:
+            o_r = right output aggregate of the group
+        '''
+        return self.groups[o_r][1]
+
+    def add_links(self, d_links, il, ir):
+        '''
+        Adds the links of the frame
+            (ir, o_r) => sum of nb_prt of the group o_r
+            (il, o_l) => nb_prt * (nb_chld + 1)
+        Parameters:
+            d_links = links accumulated by the traversal (@see PackedLinks)
+            il      = left input aggregate of the task
+            ir      = right input aggregate of the task
+        '''
+        groups = self.groups
+        d_links.add_items(ir, [(o_r, grp[0]) for (o_r, grp) in groups.items()])
+        d_links.add_items(il, [(o_l, nb_prt * (grp[1] + 1)) for grp in groups.values() for (o_l, nb_prt) in grp[2].items()])
+
+    def get_parent_incrs(self):
+        '''
+        Returns the numbers of child combinations to be back-propagated to the parent frame
+        as a tuple of lists (parent o_rs, numbers of combinations)
+        '''
+        p_ors = []
+        incrs = []
+        for (o_r, grp) in self.groups.items():
+            nb_occur = grp[1] + 1
+            for o_l in grp[2]:
+                p_ors.append(o_l + o_r)
+                incrs.append(nb_occur)
+        return p_ors, incrs
+
+    def add_children(self, child):
+        '''
+        Back-propagates the numbers of combinations of a child frame
+        (each entry (o_r, o_l) of the child adds nb_chld + 1 combinations to the group o_r + o_l)
+        Parameters:
+            child = frame of a child task
+        '''
+        groups = self.groups
+        if isinstance(child, DfsFrame):
+            for (o_r, grp) in child.groups.items():
+                nb_occur = grp[1] + 1
+                for o_l in grp[2]:
+                    groups[o_l + o_r][1] += nb_occur
+        else:
+            p_ors, incrs = child.get_parent_incrs()
+            for (p_or, incr) in zip(p_ors.tolist(), incrs.tolist()):
+                groups[p_or][1] += incr
+
+
+class DfsArrayFrame(object):
+    '''
+    A class storing a frame in flat numpy arrays
+    Entries are sorted by o_r.
+    Attributes:
+        o_rs      (numpy.array): Right output aggregates of entries
+        o_ls      (numpy.array): Left output aggregates of entries
+        nb_prts   (numpy.array): Numbers of parent combinations of entries
+        grp_idx   (numpy.array): Index of the group of each entry
+        grp_ors   (numpy.array): Right output aggregates of groups (sorted)
+        grp_prts  (numpy.array): Numbers of parent combinations of groups (sums of nb_prts)
+        grp_chlds (numpy.array): Numbers of child combinations of groups
+    '''
+
+    __slots__ = ('o_rs', 'o_ls', 'nb_prts', 'grp_idx', 'grp_ors', 'grp_prts', 'grp_chlds')
+
+    def __init__(self, o_rs, o_ls, nb_prts):
+        '''
+        Constructor
+        Parameters:
+            o_rs    = 1D array of right output aggregates (at least one entry)
+            o_ls    = 1D array of left output aggregates
+            nb_prts = 1D array of numbers of parent combinations
+        '''
+        order = np.argsort(o_rs, kind='stable')
+        self.o_rs = o_rs[order]
+        self.o_ls = o_ls[order]
+        self.nb_prts = nb_prts[order]
+
+        # Flags the first entry of each group
+        is_first = np.empty(len(order), dtype=bool)
+        is_first[0] = True
+        np.not_equal(self.o_rs[1:], self.o_rs[:-1], out=is_first[1:])
+        starts = np.flatnonzero(is_first)
+        self.grp_idx = np.cumsum(is_first) - 1
+        self.grp_ors = self.o_rs[starts]
+        self.grp_prts = np.add.reduceat(self.nb_prts, starts)
+        self.grp_chlds = np.zeros(len(starts), dtype=np.int64)
+
+    def get_groups(self):
+        '''
+        Returns the groups of the frame as a tuple of lists (o_rs, sums of nb_prt)
+        '''
+        return self.grp_ors.tolist(), self.grp_prts.tolist()
+
+    def get_nb_chld(self, o_r):
+        '''
+        Returns the number of child combinations of a group
+        Parameters:
+            o_r = right output aggregate of the group
+        '''
+        return int(self.grp_chlds[np.searchsorted(self.grp_ors, o_r)])
+
+    def add_links(self, d_links, il, ir):
+        '''
+        Adds the links of the frame (@see DfsFrame.add_links)
+        Parameters:
+            d_links = links accumulated by the traversal (@see PackedLinks)
+            il      = left input aggregate of the task
+            ir      = right input aggregate of the task
+        '''
+        d_links.add(ir, self.grp_ors, self.grp_prts)
+        d_links.add(il, self.o_ls, self.nb_prts * (self.grp_chlds[self.grp_idx] + 1))
+
+    def get_parent_incrs(self):
+        '''
+        Returns the numbers of child combinations to be back-propagated to the parent frame
+        as a tuple of arrays (parent o_rs, numbers of combinations)
+        '''
+        return self.o_ls + self.o_rs, (self.grp_chlds + 1)[self.grp_idx]
+
+    def add_children(self, child):
+        '''
+        Back-propagates the numbers of combinations of a child frame (@see DfsFrame.add_children)
+        Parameters:
+            child = frame of a child task
+        '''
+        p_ors, incrs = child.get_parent_incrs()
+        if len(p_ors) > 0:
+            grps = np.searchsorted(self.grp_ors, p_ors)
+            np.add.at(self.grp_chlds, grps, incrs)
@@ -0,0 +1,122 @@
+'''
+Created on 20261018
+@author: agent
+'''
+import json
+import threading
+
+
+class MetricsRegistry(object):
+    '''
+    A class aggregating the statistics recorded by instrumented linkers (@see TxosLinker.stats)
+    Statistics of a phase are a dictionary { name => value } storing:
+        calls    = number of calls
+        duration = wall time (in seconds)
+        counters = work counters. Counters prefixed by max_ are aggregated with max(), other counters are summed.
+    '''
+
+    '''
+    CONSTANTS
+    '''
+    # Prefix of metrics names
+    PREFIX = 'boltzmann'
+
+
+    '''
+    INITIALIZATION
+    '''
+    def __init__(self):
+        '''
+        Constructor
+        '''
+        self._lock = threading.Lock()
+        self.reset()
+
+
+    '''
+    PUBLIC METHODS
+    '''
+    def reset(self):
+        '''
+        Clears all statistics
+        '''
+        with self._lock:
+            # Statistics aggregated by phase { phase => { name => value } }
+            self._phases = {}
+            # Number of processed txs by engine { engine => nb txs }
+            self._txs = {}
+
+    def record(self, stats, engine=None):
+        '''
+        Aggregates the statistics of a tx
+        Parameters:
+            stats  = dictionary { phase => { name => value } }
+            engine = engine used for the computation of the linkability matrix (@see TxosLinker.engine)
+        '''
+        with self._lock:
+            key = str(engine)
+            self._txs[key] = self._txs.get(key, 0) + 1
+            for phase, phase_stats in stats.items():
+                agg = self._phases.setdefault(phase, {})
+                for name, value in phase_stats.items():
+                    if name.startswith('max_'):
+                        agg[name] = max(agg.get(name, value), value)
+                    else:
+                        agg[name] = agg.get(name, 0) + value
+
+    def to_dict(self):
+        '''
+        Returns a copy of the aggregated statistics
+        as a dictionary { 'txs': { engine => nb txs }, 'phases': { phase => { name => value } } }
+        '''
+        with self._lock:
+            return {
+                'txs': dict(self._txs),
+                'phases': {phase: dict(phase_stats) for phase, phase_stats in self._phases.items()}
+            }
+
+    def to_json(self):
+        '''
+        Returns the aggregated statistics as a json string (@see to_dict)
+        '''
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+    def to_prometheus(self):
+        '''
+        Returns the aggregated statistics in the text exposition format of Prometheus
+        '''
+        data = self.to_dict()
+        lines = []
+
+        name = '%s_txs_total' % self.PREFIX
+        lines.append('# HELP %s Number of txs processed by instrumented linkers' % name)
+        lines.append('# TYPE %s counter' % name)
+        for engine, nb_txs in sorted(data['txs'].items()):
+            lines.append('%s{engine="%s"} %s' % (name, engine, nb_txs))
+
+        # Groups values by metric
+        metrics = {}
+        for phase, phase_stats in sorted(data['phases'].items()):
+            for stat, value in phase_stats.items():
+                metrics.setdefault(stat, []).append((phase, value))
+
+        for stat, values in sorted(metrics.items()):
+            if stat == 'duration':
+                name = '%s_phase_duration_seconds_total' % self.PREFIX
+                desc, metric_type = 'Wall time spent in each phase', 'counter'
+            elif stat.startswith('max_'):
+                name = '%s_phase_%s' % (self.PREFIX, stat)
+                desc, metric_type = 'Max value of %s' % stat[4:], 'gauge'
+            else:
+                name = '%s_phase_%s_total' % (self.PREFIX, stat)
+                desc, metric_type = 'Total %s' % stat, 'counter'
+            lines.append('# HELP %s %s' % (name, desc))
+            lines.append('# TYPE %s %s' % (name, metric_type))
+            for phase, value in values:
+                lines.append('%s{phase="%s"} %s' % (name, phase, value))
+
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry used by instrumented linkers
+REGISTRY = MetricsRegistry()
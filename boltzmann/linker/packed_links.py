@@ -0,0 +1,130 @@
+'''
+Created on 20261018
+@author: agent
+'''
+import numpy as np
+from collections import defaultdict
+
+
+class PackedLinks(object):
+    '''
+    A class accumulating numbers of combinations associated to pairs of input/output aggregates
+    (replaces a dictionary { (in_agg, out_agg) => number of combinations })
+    Pairs are packed into integer keys (in_agg << nb_outs) | out_agg.
+    Keys and numbers of combinations are stored in parallel numpy arrays.
+    Added entries are buffered and merged (sorted unique keys) when the buffer is large enough.
+    Entries added one by one are buffered in a dictionary (@see add_items).
+    '''
+
+    '''
+    CONSTANTS
+    '''
+    # Min number of buffered entries triggering a merge
+    MIN_BUFFER_SIZE = 2**16
+
+
+    '''
+    INITIALIZATION
+    '''
+    def __init__(self, nb_outs):
+        '''
+        Constructor
+        Parameters:
+            nb_outs = number of outputs (number of bits of output aggregates)
+        '''
+        self._nb_outs = nb_outs
+        # Merged entries (sorted unique keys)
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._mults = np.zeros(0, dtype=np.int64)
+        # Buffered entries (lists of arrays)
+        self._buf_keys = []
+        self._buf_mults = []
+        self._buf_size = 0
+        self._buf_items = defaultdict(int)
+
+
+    '''
+    PUBLIC METHODS
+    '''
+    def add(self, in_agg, out_aggs, mults):
+        '''
+        Adds numbers of combinations to pairs of aggregates sharing a same input aggregate
+        Parameters:
+            in_agg   = input aggregate
+            out_aggs = 1D array of output aggregates
+            mults    = 1D array of numbers of combinations
+        '''
+        if len(out_aggs) == 0:
+            return
+        self._buf_keys.append((int(in_agg) << self._nb_outs) | out_aggs)
+        self._buf_mults.append(mults)
+        self._buf_size += len(out_aggs)
+        if self._buf_size >= max(self.MIN_BUFFER_SIZE, len(self._keys)):
+            self._merge()
+
+    def add_items(self, in_agg, items):
+        '''
+        Adds numbers of combinations to pairs of aggregates sharing a same input aggregate
+        (for a few entries stored in python lists)
+        Parameters:
+            in_agg = input aggregate
+            items  = list of tuples (output aggregate, number of combinations)
+        '''
+        base = in_agg << self._nb_outs
+        buf_items = self._buf_items
+        for (out_agg, mult) in items:
+            buf_items[base | out_agg] += mult
+        if len(buf_items) >= max(self.MIN_BUFFER_SIZE, len(self._keys)):
+            self._merge()
+
+    def update(self, links):
+        '''
+        Adds all entries of another instance
+        Parameters:
+            links = PackedLinks storing pairs of aggregates of the same tx
+        '''
+        links._merge()
+        self._buf_keys.append(links._keys)
+        self._buf_mults.append(links._mults)
+        self._buf_size += len(links._keys)
+        self._merge()
+
+    def unpack(self):
+        '''
+        Returns the pairs of aggregates and their numbers of combinations
+        as a tuple of 1D arrays (in_aggs, out_aggs, mults)
+        '''
+        self._merge()
+        in_aggs = self._keys >> self._nb_outs
+        out_aggs = self._keys & (2**self._nb_outs - 1)
+        return in_aggs, out_aggs, self._mults
+
+    def __len__(self):
+        '''
+        Returns the number of distinct pairs of aggregates
+        '''
+        self._merge()
+        return len(self._keys)
+
+
+    '''
+    INTERNALS
+    '''
+    def _merge(self):
+        '''
+        Merges buffered entries with merged entries (numbers of combinations of a same key are summed)
+        '''
+        if (self._buf_size == 0) and (len(self._buf_items) == 0):
+            return
+        nb_items = len(self._buf_items)
+        items_keys = np.fromiter(self._buf_items.keys(), dtype=np.int64, count=nb_items)
+        items_mults = np.fromiter(self._buf_items.values(), dtype=np.int64, count=nb_items)
+        keys = np.concatenate([self._keys, items_keys] + self._buf_keys)
+        mults = np.concatenate([self._mults, items_mults] + self._buf_mults)
+        self._keys, inverse = np.unique(keys, return_inverse=True)
+        self._mults = np.zeros(len(self._keys), dtype=np.int64)
+        np.add.at(self._mults, inverse, mults)
+        self._buf_keys = []
+        self._buf_mults = []
+        self._buf_size = 0
+        self._buf_items = defaultdict(int)
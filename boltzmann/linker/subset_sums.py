@@ -0,0 +1,55 @@
+'''
+Created on 20261018
+@author: agent
+'''
+import numpy as np
+
+
+def compute_subset_sums(vals):
+    '''
+    Computes the sums of all subsets of a list of values
+    Returns a 1D numpy array of 2**n sums indexed by subset bitmask
+    (bit j of the index is set if the jth value belongs to the subset)
+    Parameters:
+        vals = list (or 1D array) of n integer values
+
+    Notes:
+    Sums are computed by doubling: once the sums of all subsets of the first j values
+    are known, the sums of subsets including the jth value are obtained with a single
+    vectorized addition (sums[mask | 2**j] = sums[mask] + vals[j]).
+    Total work is O(2**n) instead of O(n * 2**n) for a product with a membership matrix.
+    '''
+    vals = np.asarray(vals, dtype=np.int64)
+    nb_vals = len(vals)
+    sums = np.zeros(2**nb_vals, dtype=np.int64)
+
+    for j in range(0, nb_vals):
+        two_exp_j = 2**j
+        np.add(sums[:two_exp_j], vals[j], out=sums[two_exp_j:2*two_exp_j])
+
+    return sums
+
+
+def compute_subset_unions(masks):
+    '''
+    Computes the unions (bitwise OR) of all subsets of a list of bitmasks
+    Returns a 1D numpy array of 2**n unions indexed by subset bitmask
+    (bit j of the index is set if the jth bitmask belongs to the subset)
+    Parameters:
+        masks = list (or 1D array) of n integer bitmasks
+
+    Notes:
+    Unions are computed by doubling (@see compute_subset_sums).
+    If masks are disjoint, the sum of the values of the txos covered by unions[k] is the sum
+    of the values of the subset k. It allows to derive the aggregates of a list of packed txos
+    from the aggregates of the unpacked txos (all_agg_val[unions]).
+    '''
+    masks = np.asarray(masks, dtype=np.int64)
+    nb_masks = len(masks)
+    unions = np.zeros(2**nb_masks, dtype=np.int64)
+
+    for j in range(0, nb_masks):
+        two_exp_j = 2**j
+        np.bitwise_or(unions[:two_exp_j], masks[j], out=unions[two_exp_j:2*two_exp_j])
+
+    return unions
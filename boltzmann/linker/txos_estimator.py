@@ -0,0 +1,358 @@
+'''
+Created on 20261018
+@author: agent
+'''
+import math
+import random
+import itertools
+from fractions import Fraction
+import numpy as np
+from boltzmann.linker.txos_linker import TxosLinker
+
+
+class TxosEstimator(TxosLinker):
+    '''
+    A class allowing to estimate the entropy of Bitcoin transactions
+    and the linkability of inputs/outputs of a transaction by sampling.
+    Runtime is bounded by a number of samples instead of growing with 2**nb_txos,
+    allowing to process transactions with too many inputs or outputs for the TxosLinker.
+
+    Each sample is a combination built by sequential importance sampling:
+        - the next block (input sub-aggregate, output sub-aggregate) always contains the remaining input with lowest index
+        - a block is drawn uniformly among all value-compatible blocks storing at most max_block_size inputs and outputs
+          (the remainder of the tx must also stay value-compatible)
+        - or the last block storing all remaining inputs and outputs is drawn, if it's value-compatible
+    The weight of a sample is the product of the number of candidate blocks found at each step (0 for a dead end).
+    The average weight is an unbiased estimator of the number of combinations made of blocks
+    storing at most max_block_size inputs and outputs (the last block excepted).
+
+    If max_block_size is lower than the size of the largest non-last block of the tx (max(nb_ins-1, nb_outs)),
+    combinations with larger blocks are never sampled: the estimate and its confidence interval are restricted
+    to the sampled combinations (@see restricted_block_size). Otherwise, they target all the combinations of the tx.
+    '''
+
+    '''
+    CONSTANTS
+    '''
+    # Default number of samples
+    NB_SAMPLES = 1000
+
+    # Default max number of inputs (or outputs) in a sampled block (the last block excepted)
+    MAX_BLOCK_SIZE = 2
+
+    # Quantile of the normal distribution used for 95% confidence intervals
+    Z_95 = 1.96
+
+
+    '''
+    ATTRIBUTES
+
+    # Confidence interval (95%) of the estimated number of combinations (tuple (low, high))
+    nb_cmbn_ci = (0, 0)
+
+    # Max number of inputs (or outputs) of the blocks of the sampled combinations
+    # if the estimates are restricted to these combinations, None if all combinations are sampled
+    restricted_block_size = None
+
+    # Standard errors of the estimated linkability probabilities
+    mat_lnk_stderr = np.array()
+
+    # Number of samples drawn
+    nb_samples = 0
+    '''
+
+
+    '''
+    INITIALIZATION
+    '''
+    def __init__(self, inputs=[], outputs=[], fees=0, max_duration=TxosLinker.MAX_DURATION,
+                 nb_samples=NB_SAMPLES, max_block_size=MAX_BLOCK_SIZE, seed=None, cancel=None):
+        '''
+        Constructor
+        Parameters:
+            inputs         = list of inputs txos [(v1_id, v1_amount), ...]
+            outputs        = list of outputs txos [(v1_id, v1_amount), ...]
+            fees           = amount of fees associated to the transaction
+            max_duration   = max duration allocated to processing of a single tx (in seconds)
+            nb_samples     = number of samples to be drawn
+            max_block_size = max number of inputs (or outputs) in a sampled block (the last block excepted)
+            seed           = seed of the random generator (for reproducible estimates)
+            cancel         = cancellation token (@see TxosLinker)
+        '''
+        TxosLinker.__init__(self, inputs, outputs, fees, max_duration, max_txos=None, cancel=cancel)
+        self._nb_samples = nb_samples
+        self._max_block_size = max_block_size
+        self._rng = random.Random(seed)
+
+
+    '''
+    PUBLIC METHODS
+    '''
+    def process(self, linked_txos=[], options=[TxosLinker.LINKABILITY], intrafees=(0,0)):
+        '''
+        Estimates the linkability between a set of input txos and a set of output txos
+        Returns:
+            estimated linkability matrix (numbers of combinations, as python integers)
+            estimated number of possible combinations for the transaction
+            list of inputs (sorted by decreasing value)
+            list of outputs (sorted by decreasing value)
+        Sets the attributes nb_cmbn_ci, mat_lnk_stderr, nb_samples, restricted_block_size
+        and complete (False if max duration has been reached before all samples have been drawn)
+        Parameters:
+            linked_txos     = list of sets storing linked input txos. Each txo is identified by its id
+            options         = list of actions to be applied
+                MERGE_FEES  : consider that all fees have been paid by a unique sender and manage fees as an additionnal output
+            intrafees       = tuple (fees_maker, fees_taker) of max "fees" paid among participants
+                              (@see TxosLinker.process)
+        '''
+        self._options = options
+        self.complete = True
+        self.cancelled = False
+        self.inputs = self._orig_ins.copy()
+        self.outputs = self._orig_outs.copy()
+        self._fees_maker = intrafees[0]
+        self._fees_taker = intrafees[1]
+        self._has_intrafees = True if (self._fees_maker or self._fees_taker) else False
+
+        # Packs txos known as being controlled by a same entity
+        if linked_txos:
+            self._pack_linked_txos(linked_txos)
+
+        # Manages fees
+        if (self.MERGE_FEES in options) and (self._orig_fees > 0):
+            self._fees = 0
+            txo_fees = (self.FEES, self._orig_fees)
+            self.outputs.append(txo_fees)
+        else:
+            self._fees = self._orig_fees
+
+        # Removes txos with null value and orders txos by value
+        self.inputs = sorted(filter(lambda x: x[1] > 0, self.inputs), key=lambda tup: tup[1], reverse=True)
+        self.outputs = sorted(filter(lambda x: x[1] > 0, self.outputs), key=lambda tup: tup[1], reverse=True)
+
+        nb_ins = len(self.inputs)
+        nb_outs = len(self.outputs)
+        self.nb_samples = 0
+        self.restricted_block_size = None
+
+        if (nb_ins == 0) or (nb_outs == 0):
+            nb_cmbn = 1
+            mat_lnk = np.ones((nb_outs, nb_ins), dtype=np.int64)
+            self.nb_cmbn_ci = (1, 1)
+            self.mat_lnk_stderr = np.zeros((nb_outs, nb_ins))
+        else:
+            nb_cmbn, mat_lnk = self._estimate_link_matrix()
+            # Combinations with blocks larger than max_block_size aren't sampled
+            # (non-last blocks store at most nb_ins-1 inputs and nb_outs outputs)
+            if self._max_block_size < max(nb_ins - 1, nb_outs):
+                self.restricted_block_size = self._max_block_size
+
+        # Unpacks the matrices (the lists of txos are unpacked once)
+        if self.mat_lnk_stderr is not None:
+            packed_ins, packed_outs = self.inputs.copy(), self.outputs.copy()
+            self.mat_lnk_stderr = self._unpack_link_matrix(self.mat_lnk_stderr, nb_cmbn)
+            self.inputs, self.outputs = packed_ins, packed_outs
+        mat_lnk = self._unpack_link_matrix(mat_lnk, nb_cmbn)
+
+        return mat_lnk, nb_cmbn, self.inputs, self.outputs
+
+
+    '''
+    ESTIMATION
+    '''
+    def _estimate_link_matrix(self):
+        '''
+        Estimates the number of combinations and the linkability matrix
+        Returns the estimated number of combinations and the estimated links matrix
+        '''
+        in_vals = np.array([v[1] for v in self.inputs], dtype=np.int64)
+        out_vals = np.array([v[1] for v in self.outputs], dtype=np.int64)
+
+        # Computes the window of differences (in_val - out_val) allowed for a block
+        if self._has_intrafees:
+            min_diff = min(- self._fees_maker, 0)
+            max_diff = max(self._fees + self._fees_taker, 0)
+        else:
+            min_diff = 0
+            max_diff = self._fees
+
+        # Computes all output sub-aggregates with at most max_block_size outputs (sorted by value)
+        out_subsets = self._get_subsets(len(out_vals), self._max_block_size)
+        out_sums = np.append(out_vals, 0)[out_subsets].sum(axis=1)
+        order = np.argsort(out_sums, kind='stable')
+        out_subsets = out_subsets[order]
+        out_sums = out_sums[order]
+        # Computes the list of sub-aggregates storing each output
+        out_to_subsets = [np.nonzero((out_subsets == o).any(axis=1))[0] for o in range(len(out_vals))]
+
+        # Draws the samples
+        weights = []
+        blocks = []
+        deadline = self._get_deadline()
+        for _ in range(0, self._nb_samples):
+            if self._is_interrupted(deadline):
+                self.complete = False
+                break
+            weight, in_blk, out_blk = self._sample_cmbn(in_vals, out_vals, out_subsets, out_sums, out_to_subsets, min_diff, max_diff)
+            weights.append(weight)
+            blocks.append((in_blk, out_blk))
+
+        self.nb_samples = len(weights)
+        return self._compute_estimates(weights, blocks)
+
+
+    def _sample_cmbn(self, in_vals, out_vals, out_subsets, out_sums, out_to_subsets, min_diff, max_diff):
+        '''
+        Draws a combination of the transaction
+        Returns:
+            weight of the sample (python integer, 0 if the sampling has reached a dead end)
+            array of block indices of inputs
+            array of block indices of outputs
+        Parameters:
+            in_vals        = array of input values
+            out_vals       = array of output values
+            out_subsets    = 2D array of output sub-aggregates (one row of output indices per sub-aggregate,
+                             padded with nb_outs), sorted by value
+            out_sums       = array of values of output sub-aggregates
+            out_to_subsets = list of arrays of sub-aggregates storing each output
+            min_diff       = min difference (in_val - out_val) allowed for a block
+            max_diff       = max difference (in_val - out_val) allowed for a block
+        '''
+        nb_ins = len(in_vals)
+        nb_outs = len(out_vals)
+        in_blk = np.full(nb_ins, -1, dtype=np.int64)
+        out_blk = np.full(nb_outs, -1, dtype=np.int64)
+        in_vals_pad = np.append(in_vals, 0)
+
+        rem_ins = np.arange(nb_ins)
+        alive = np.ones(len(out_sums), dtype=bool)
+        diff = int(in_vals.sum() - out_vals.sum())
+        weight = 1
+        blk = 0
+
+        while True:
+            # Checks if the remainder of the tx can be the last block
+            can_stop = min_diff <= diff <= max_diff
+
+            # Computes the candidate input sub-aggregates (input with lowest index + at most max_block_size-1 other inputs)
+            others = rem_ins[1:]
+            subsets = self._get_subsets(len(others), self._max_block_size - 1)
+            in_subsets = np.hstack((np.full((len(subsets), 1), rem_ins[0]), np.append(others, nb_ins)[subsets]))
+            if len(others) <= self._max_block_size - 1:
+                # Removes the sub-aggregate storing all remaining inputs (only allowed as last block)
+                in_subsets = in_subsets[:-1]
+            in_sums = in_vals_pad[in_subsets].sum(axis=1)
+
+            # Computes the window of values of output sub-aggregates matching each input sub-aggregate
+            # (differences of the block and of the remainder of the tx must be in [min_diff, max_diff])
+            lo_diff = max(min_diff, diff - max_diff)
+            hi_diff = min(max_diff, diff - min_diff)
+            lo = np.searchsorted(out_sums, in_sums - hi_diff, side='left')
+            hi = np.searchsorted(out_sums, in_sums - lo_diff, side='right')
+            # Counts the output sub-aggregates not using outputs from previous blocks
+            nb_alive = np.zeros(len(alive) + 1, dtype=np.int64)
+            np.cumsum(alive, out=nb_alive[1:])
+            counts = np.where(hi > lo, nb_alive[np.maximum(hi, lo)] - nb_alive[lo], 0)
+
+            # Draws a candidate block
+            nb_cands = int(counts.sum()) + int(can_stop)
+            if nb_cands == 0:
+                return 0, in_blk, out_blk
+            weight *= nb_cands
+            r = self._rng.randrange(nb_cands)
+
+            if can_stop and (r == nb_cands - 1):
+                # Last block
+                in_blk[rem_ins] = blk
+                out_blk[out_blk == -1] = blk
+                return weight, in_blk, out_blk
+
+            cum_counts = np.cumsum(counts)
+            a = int(np.searchsorted(cum_counts, r, side='right'))
+            r -= int(cum_counts[a] - counts[a])
+            # Gets the rth alive output sub-aggregate in the window
+            x = int(np.searchsorted(nb_alive, nb_alive[lo[a]] + r + 1, side='left')) - 1
+
+            # Registers the block
+            ins = in_subsets[a][in_subsets[a] < nb_ins]
+            outs = out_subsets[x][out_subsets[x] < nb_outs]
+            in_blk[ins] = blk
+            out_blk[outs] = blk
+            for o in outs:
+                alive[out_to_subsets[o]] = False
+            rem_ins = rem_ins[in_blk[rem_ins] == -1]
+            diff -= int(in_sums[a] - out_sums[x])
+            blk += 1
+
+
+    def _compute_estimates(self, weights, blocks):
+        '''
+        Computes the estimates from a list of samples
+        Returns the estimated number of combinations and the estimated links matrix
+        Parameters:
+            weights = list of weights of the samples (python integers)
+            blocks  = list of tuples (array of block indices of inputs, array of block indices of outputs)
+        '''
+        nb_ins = len(self.inputs)
+        nb_outs = len(self.outputs)
+        nb_samples = len(weights)
+        sum_w = sum(weights)
+
+        if (nb_samples == 0) or (sum_w == 0):
+            self.nb_cmbn_ci = (0, 0)
+            self.mat_lnk_stderr = None
+            return 0, None
+
+        # Estimates the number of combinations and computes its confidence interval (exact rational arithmetic)
+        mean = Fraction(sum_w, nb_samples)
+        nb_cmbn = round(mean)
+        if nb_samples > 1:
+            var_num = nb_samples * sum([w * w for w in weights]) - sum_w * sum_w
+            half_width = Fraction(math.isqrt(var_num), nb_samples) / Fraction(math.sqrt(nb_samples - 1)) * Fraction(self.Z_95)
+        else:
+            half_width = mean
+        self.nb_cmbn_ci = (max(0, math.floor(mean - half_width)), math.ceil(mean + half_width))
+
+        # Estimates linkability probabilities (weights are scaled by the max weight to stay in float range)
+        max_w = max(weights)
+        shape = (nb_outs, nb_ins)
+        sum_wl = np.zeros(shape)
+        sum_w2l = np.zeros(shape)
+        sum_fw = 0.0
+        sum_fw2 = 0.0
+        for (w, (in_blk, out_blk)) in zip(weights, blocks):
+            if w == 0:
+                continue
+            fw = (w << 53) // max_w / 2.0**53
+            lnk = out_blk[:,np.newaxis] == in_blk[np.newaxis,:]
+            sum_wl += fw * lnk
+            sum_w2l += fw * fw * lnk
+            sum_fw += fw
+            sum_fw2 += fw * fw
+        prob = sum_wl / sum_fw
+        var = ((1 - 2 * prob) * sum_w2l + prob * prob * sum_fw2) / (sum_fw * sum_fw)
+        self.mat_lnk_stderr = np.sqrt(np.maximum(var, 0))
+
+        # Converts probabilities into numbers of combinations (python integers, exact for probabilities 0 and 1)
+        scaled_prob = np.round(prob * 2**52).astype(np.int64).astype(object)
+        mat_lnk = (scaled_prob * nb_cmbn + 2**51) // 2**52
+
+        return nb_cmbn, mat_lnk
+
+
+    def _get_subsets(self, nb_items, max_size):
+        '''
+        Computes all subsets of at most max_size items among nb_items items
+        Returns a 2D array with one row per subset (indices of items padded with nb_items),
+        starting with the empty subset
+        Parameters:
+            nb_items = number of items
+            max_size = max number of items in a subset
+        '''
+        max_size = max(0, max_size)
+        rows = [np.full((1, max_size), nb_items, dtype=np.int64)]
+        for size in range(1, min(max_size, nb_items) + 1):
+            cmbns = np.array(list(itertools.combinations(range(nb_items), size)), dtype=np.int64).reshape(-1, size)
+            pad = np.full((len(cmbns), max_size - size), nb_items, dtype=np.int64)
+            rows.append(np.hstack((cmbns, pad)))
+        return np.vstack(rows)
@@ -3,10 +3,20 @@ Created on 20160917
 Based on original works done for OXT in January 2015
 @author: LaurentMT
 '''
+import os
+import pickle
+import hashlib
+import itertools
 import numpy as np
-from datetime import datetime
+from math import comb
+from bisect import bisect_left, bisect_right
+from time import perf_counter, monotonic
 from collections import deque, defaultdict
-from sortedcontainers.sortedlist import SortedList
+from boltzmann.linker.dfs_frame import DfsFrame, new_frame
+from boltzmann.linker.packed_links import PackedLinks
+from boltzmann.linker.subset_sums import compute_subset_sums, compute_subset_unions
+from boltzmann.linker.components import find_components, merge_nb_blocks, count_completions, count_linked
+from boltzmann.linker.metrics import REGISTRY
 from boltzmann.utils.lists import merge_sets
 import sys
 
@@ -27,14 +37,32 @@ class TxosLinker(object):
     LINKABILITY = 'LINKABILITY'
     PRECHECK = 'PRECHECK'
     MERGE_FEES = 'MERGE_FEES'
+    MEMOIZE = 'MEMOIZE'
+    ANYTIME = 'ANYTIME'
+    DECOMPOSE = 'DECOMPOSE'
+    MULTISET = 'MULTISET'
 
     # Markers
     FEES = 'FEES'
     PACK = 'PACK'
 
+    # Engines (other engines are named after their options)
+    DFS = 'DFS'
+
     # Max number of inputs (or outputs) which can be processed by this algorithm
     MAX_NB_TXOS = 12
 
+    # Max number of inputs (or outputs) of a tx which can be split into independent components
+    MAX_NB_TXOS_DECOMPOSE = 20
+
+    # Number of iterations of the depth-first traversal between 2 checks of the deadline, of the cancellation and of the progress
+    CHECK_INTERVAL = 64
+
+    # Min number of candidate pairs of output aggregates filtered with vectorized operations by the depth-first traversal
+    MIN_VECTORIZED_SIZE = 4096
+
+    # Version of the format of checkpoints (checkpoints saved with another format are ignored)
+    CHECKPOINT_VERSION = 3
 
 
     '''
@@ -58,15 +86,40 @@ class TxosLinker(object):
     # Number of valid transactions combinations
     nb_tx_cmbn = 0
 
+    # Flag indicating if the computation of the linkability matrix has been completed
+    # (False if max duration has been reached)
+    complete = True
+
+    # Matrix of deterministic links confirmed by the precheck (rows = output txos, columns = input txos, booleans)
+    # Deterministic links of partial results must be read from this matrix. None if the precheck hasn't been applied.
+    mat_dtrm = None
+
+    # Engine used by the last call to process() (DFS, MEMOIZE, MULTISET, DECOMPOSE, PRECHECK or None if nothing was computed)
+    engine = None
+
+    # Statistics of the last call to process() if instrumentation is enabled (None otherwise)
+    # Dictionary { phase => { 'calls': nb calls, 'duration': wall time in seconds, counter => value } }
+    stats = None
+
     # Maximum duration of the script (in seconds)
     _max_duration = MAX_DURATION
+
+    # Number of processes used for the computation of the linkability matrix
+    _workers = 1
+
+    # Path of the checkpoint file storing the state of an interrupted computation
+    _checkpoint = None
+
+    # Flag indicating if the computation has been cancelled (@see cancel parameter of the constructor)
+    cancelled = False
     '''
 
 
     '''
     INITIALIZATION
     '''
-    def __init__(self, inputs=[], outputs=[], fees=0, max_duration=MAX_DURATION, max_txos=MAX_NB_TXOS):
+    def __init__(self, inputs=[], outputs=[], fees=0, max_duration=MAX_DURATION, max_txos=MAX_NB_TXOS, workers=1, checkpoint=None, instrument=False,
+                 progress=None, cancel=None):
         '''
         Constructor
         Parameters:
@@ -75,13 +128,35 @@ class TxosLinker(object):
             fees         = amount of fees associated to the transaction
             max_duration = max duration allocated to processing of a single tx (in seconds)
             max_txos     = max number of txos. Txs with more than max_txos inputs or outputs are not processed.
+            workers      = number of processes used by the depth-first computation of the linkability matrix
+            checkpoint   = path of a file used to save the state of the depth-first computation of the linkability matrix
+                           when max duration is reached, and to resume it during a later run (not used if None)
+                           Checkpoints aren't supported by the parallel computation (ValueError raised if workers > 1)
+            instrument   = records the wall time and work counters of each phase of process()
+                           into the attribute stats and into the process-wide registry (@see boltzmann.linker.metrics)
+            progress     = function called periodically by the depth-first computation of the linkability matrix
+                           with (number of visited nodes, current depth, estimated fraction of the root decompositions done)
+                           (number of visited nodes and depth are None for the parallel computation)
+            cancel       = cancellation token (e.g. threading.Event) which can be set by another thread.
+                           The computation is interrupted as if max duration had been reached (attribute cancelled set to True)
         '''
+        if (workers > 1) and (checkpoint is not None):
+            raise ValueError('Checkpoints are not supported with several workers')
         self._orig_ins = inputs
         self._orig_outs = outputs
         self._orig_fees = fees
         self._max_duration = max_duration
         self.max_txos = max_txos
+        self._workers = workers
+        self._checkpoint = checkpoint
+        self._instrument = instrument
+        self._progress = progress
+        self._cancel = cancel
         self._packs = []
+        self._prepared_ins = None
+        self.engine = None
+        self.stats = None
+        self.cancelled = False
 
 
     '''
@@ -95,18 +170,33 @@ class TxosLinker(object):
             number of possible combinations for the transaction
             list of inputs (sorted by decreasing value)
             list of outputs (sorted by decreasing value)
+        Sets the attribute complete to False if the computation has been interrupted (max duration reached)
+        and the attribute mat_dtrm (deterministic links confirmed by the precheck)
         Parameters:
             linked_txos     = list of sets storing linked input txos. Each txo is identified by its id
             options         = list of actions to be applied
                 LINKABILITY : computes the linkability matrix
                 PRECHECK    : prechecks existence of deterministic links between inputs and outputs
                 MERGE_FEES  : consider that all fees have been paid by a unique sender and manage fees as an additionnal output
+                MEMOIZE     : computes the linkability matrix with the memoized engine (same results, each subproblem solved once)
+                ANYTIME     : returns partial results if max duration is reached by the depth-first engine
+                              (lower bound of the number of combinations, partial linkability matrix, complete = False)
+                DECOMPOSE   : splits the tx into independent components processed separately
+                              (each component must have at most max_txos inputs and outputs)
+                MULTISET    : computes the linkability matrix with the multiset engine (txos with same value are grouped)
+                              (the numbers of multisets of inputs and of outputs must be at most 2**max_txos)
             intrafees       = tuple (fees_maker, fees_taker) of max "fees" paid among participants
                               used for joinmarket transactions
                               fees_maker are potential max "fees" received by a participant from another participant
                               fees_taker are potential max "fees" paid by a participant to all others participants
         '''
         self._options = options
+        self.complete = True
+        self.cancelled = False
+        self.engine = None
+        self.mat_dtrm = None
+        self.stats = {} if self._instrument else None
+        self._prepared_ins = None
         self.inputs = self._orig_ins.copy()
         self.outputs = self._orig_outs.copy()
         self._fees_maker = intrafees[0]
@@ -130,12 +220,16 @@ class TxosLinker(object):
 
         # Checks deterministic links
         nb_cmbn = 0
+        dtrm_pairs = None
         if self.PRECHECK in options and self._check_limit_ok(self.PRECHECK) and (not self._has_intrafees):
             # Prepares the data
-            self._prepare_data()
-            self._match_agg_by_val()
+            self._run_phase('prepare_data', self._prepare_data)
+            self._run_phase('match_agg_by_val', self._match_agg_by_val)
             # Checks deterministic links
-            dtrm_lnks, dtrm_lnks_id = self._check_dtrm_links()
+            dtrm_lnks, dtrm_lnks_id = self._run_phase('check_dtrm_links', self._check_dtrm_links)
+            self.engine = self.PRECHECK
+            # Keeps the deterministic links (pairs of ids of unpacked txos)
+            dtrm_pairs = self._unpack_txo_pairs(dtrm_lnks_id)
             # If deterministic links have been found, fills the linkability matrix
             # (returned as result if linkability is not processed)
             if dtrm_lnks is not None:
@@ -154,45 +248,181 @@ class TxosLinker(object):
             nb_cmbn = 1
             shape = (nb_outs, nb_ins)
             mat_lnk = np.ones(shape, dtype=np.int64)
-        elif self.LINKABILITY in options and self._check_limit_ok(self.LINKABILITY):
+        elif self.LINKABILITY in options and \
+             (self._check_limit_ok(self.LINKABILITY) or (self.DECOMPOSE in options) or (self.MULTISET in options)):
             # Packs deterministic links if needed
             if dtrm_lnks_id is not None:
                 dtrm_lnks_id = [set(lnk) for lnk in dtrm_lnks_id]
                 self._pack_linked_txos(dtrm_lnks_id)
-            # Prepares data
-            self._prepare_data()
-            self._match_agg_by_val()
-            # Computes a matrix storing a tree composed of valid pairs of input aggregates
-            self._compute_in_agg_cmbn()
-            # Builds the linkability matrix
-            nb_cmbn, mat_lnk = self._compute_link_matrix()
+            # Splits the tx into independent components if needed
+            components = None
+            if (self.DECOMPOSE in options) and (not self._has_intrafees):
+                components = self._find_components()
+            if components is not None:
+                # Builds the linkability matrix from the results of the components
+                nb_cmbn, mat_lnk = self._run_phase('compute_link_matrix', self._compute_link_matrix_components, components)
+                self.engine = self.DECOMPOSE
+            elif (self.MULTISET in options) and (not self._has_intrafees) and self._check_limit_ok(self.MULTISET):
+                # Builds the linkability matrix from multisets of txos with same value
+                self.inputs = self._sort_txos(self.inputs)
+                self.outputs = self._sort_txos(self.outputs)
+                nb_cmbn, mat_lnk = self._run_phase('compute_link_matrix', self._compute_link_matrix_multiset)
+                self.engine = self.MULTISET
+            elif self._check_limit_ok(self.LINKABILITY):
+                # Prepares data (derived from the data prepared for the precheck if available)
+                if self._run_phase('prepare_data', self._prepare_data):
+                    self._run_phase('match_agg_by_val', self._match_agg_by_val)
+                # Computes a matrix storing a tree composed of valid pairs of input aggregates
+                self._run_phase('compute_in_agg_cmbn', self._compute_in_agg_cmbn)
+                # Builds the linkability matrix
+                if self.MEMOIZE in options:
+                    nb_cmbn, mat_lnk = self._run_phase('compute_link_matrix', self._compute_link_matrix_memo)
+                    self.engine = self.MEMOIZE
+                else:
+                    nb_cmbn, mat_lnk = self._run_phase('compute_link_matrix', self._compute_link_matrix)
+                    self.engine = self.DFS
 
         # Unpacks the matrix
-        mat_lnk = self._unpack_link_matrix(mat_lnk, nb_cmbn)
+        mat_lnk = self._run_phase('unpack_link_matrix', self._unpack_link_matrix, mat_lnk, nb_cmbn)
+        if dtrm_pairs is not None:
+            self.mat_dtrm = self._build_dtrm_matrix(dtrm_pairs)
+
+        if self.stats is not None:
+            REGISTRY.record(self.stats, self.engine)
 
         # Returns results
         return mat_lnk, nb_cmbn, self.inputs, self.outputs
 
 
+    '''
+    INSTRUMENTATION
+    '''
+    def _run_phase(self, phase, method, *args):
+        '''
+        Runs a phase of the processing and records its wall time if instrumentation is enabled
+        Returns the result of the phase
+        Parameters:
+            phase  = name of the phase
+            method = method implementing the phase
+            args   = arguments of the method
+        '''
+        if self.stats is None:
+            return method(*args)
+        start = perf_counter()
+        res = method(*args)
+        self._add_counters(phase, calls=1, duration=perf_counter() - start)
+        return res
+
+
+    def _add_counters(self, phase, **counters):
+        '''
+        Adds work counters to the statistics of a phase (no-op if instrumentation is disabled)
+        Counters prefixed by max_ store the max value, other counters are summed.
+        Parameters:
+            phase    = name of the phase
+            counters = values of counters
+        '''
+        if self.stats is None:
+            return
+        phase_stats = self.stats.setdefault(phase, {})
+        for name, value in counters.items():
+            if name.startswith('max_'):
+                phase_stats[name] = max(phase_stats.get(name, value), value)
+            else:
+                phase_stats[name] = phase_stats.get(name, 0) + value
+
+
+    def _get_deadline(self):
+        '''
+        Returns the deadline of the computation (monotonic clock, @see time.monotonic)
+        '''
+        return monotonic() + self._max_duration
+
+
+    def _is_interrupted(self, deadline):
+        '''
+        Checks if the computation must be interrupted (deadline reached or computation cancelled)
+        Sets the attribute cancelled if the computation has been cancelled
+        Parameters:
+            deadline = deadline of the computation (@see _get_deadline)
+        '''
+        if (self._cancel is not None) and self._cancel.is_set():
+            self.cancelled = True
+            return True
+        return monotonic() >= deadline
+
+
     '''
     PREPARATION
     '''
     def _prepare_data(self):
         '''
         Computes several data structures which will be used later
+        Returns True if data structures have been (re)computed, False if they're still valid
+        Data structures computed by a previous call (precheck) are reused:
+            - outputs are never packed between two calls. Their data is kept as is.
+            - inputs are unchanged if no deterministic link has been packed. Their data is kept as is.
+            - otherwise, data related to the inputs is derived from the data of the unpacked inputs
+        '''
+        if self._prepared_ins is None:
+            # Prepares data related to the input txos
+            self.inputs,\
+            self._all_in_agg,\
+            self._all_in_agg_val = self._prepare_txos(self.inputs)
+
+            # Prepares data related to the output txos
+            self.outputs,\
+            self._all_out_agg,\
+            self._all_out_agg_val = self._prepare_txos(self.outputs)
+        elif self.inputs != self._prepared_ins:
+            # Derives data related to the packed input txos
+            self.inputs,\
+            self._all_in_agg,\
+            self._all_in_agg_val = self._derive_packed_txos(self.inputs, self._prepared_ins, self._all_in_agg_val)
+        else:
+            return False
+
+        self._prepared_ins = list(self.inputs)
+        return True
+
+
+    def _derive_packed_txos(self, txos, prev_txos, prev_agg_val):
+        '''
+        Derives the data structures related to a list of txos from the data structures
+        computed for a list of txos before some of them were packed (@see _prepare_txos)
+        Returns:
+            list of txos sorted by decreasing values
+            array of aggregates (combinations of txos) encoded as integer bitmasks
+            array of values associated to the aggregates
         Parameters:
-            inputs  = list of input txos
-            outputs = list of output txos
+            txos         = list of txos (some of them are packs of txos stored in prev_txos)
+            prev_txos    = list of txos associated to prev_agg_val (sorted by decreasing values)
+            prev_agg_val = array of values of the aggregates of prev_txos
         '''
-        # Prepares data related to the input txos
-        self.inputs,\
-        self._all_in_agg,\
-        self._all_in_agg_val = self._prepare_txos(self.inputs)
+        txos = self._sort_txos(txos)
+
+        # Indices of txos in prev_txos (a list of indices per txo, in case of duplicates)
+        prev_idx = defaultdict(list)
+        for idx, txo in enumerate(prev_txos):
+            prev_idx[txo].append(idx)
+        packs = {lbl: ins for (lbl, _, lctn, ins, _) in self._packs if lctn == 'INPUTS'}
+
+        # Computes the bitmask of prev_txos covered by each txo
+        # (a single bit for an unpacked txo, the OR of the bits of its txos for a pack)
+        masks = []
+        for txo in txos:
+            members = [txo] if prev_idx.get(txo) else packs[txo[0]]
+            mask = 0
+            for member in members:
+                mask |= 1 << prev_idx[member].pop(0)
+            masks.append(mask)
+
+        # Aggregate k covers the aggregate unions[k] of prev_txos
+        expnt = len(txos)
+        all_agg = np.arange(2**expnt, dtype=self._get_agg_dtype(expnt))
+        all_agg_val = prev_agg_val[compute_subset_unions(masks)]
 
-        # Prepares data related to the output txos
-        self.outputs,\
-        self._all_out_agg,\
-        self._all_out_agg_val = self._prepare_txos(self.outputs)
+        return txos, all_agg, all_agg_val
 
 
     def _prepare_txos(self, txos):
@@ -200,40 +430,41 @@ class TxosLinker(object):
         Computes several data structures related to a list of txos
         Returns:
             list of txos sorted by decreasing values
-            array of aggregates (combinations of txos) in binary format
+            array of aggregates (combinations of txos) encoded as integer bitmasks
             array of values associated to the aggregates
         Parameters:
             txos = list of txos (list of tuples (id, value))
         '''
-        # Removes txos with null value
-        txos = filter(lambda x: x[1] > 0, txos)
-
-        # Orders txos by value
-        txos = sorted(txos, key=lambda tup: tup[1], reverse=True)
+        # Removes txos with null value and orders txos by value
+        txos = self._sort_txos(txos)
 
         # Creates a 1D array of values
         vals = [ e[1] for _, e in enumerate(txos) ]
         all_val = np.array(vals, dtype='int64')
 
-        # Computes all possible combinations of txos encoded in binary format
+        # Computes all possible combinations of txos encoded as integer bitmasks
+        # (bit j of an aggregate is set if the aggregate contains the jth txo)
         expnt = len(txos)
-        shape = (expnt, 2**expnt)
-        all_agg = np.zeros(shape, dtype=np.bool)
-        base = np.array([0,1], dtype=bool)
-
-        for j in range(0, expnt):
-            two_exp_j = 2**j
-            tmp = np.repeat(base, two_exp_j)
-            all_agg[j, :] = np.tile(tmp, int(2**(expnt-1) / two_exp_j))
-        #all_agg = np.arange(2**expnt) >> np.arange(expnt)[::, np.newaxis] & 1
+        all_agg = np.arange(2**expnt, dtype=self._get_agg_dtype(expnt))
 
         # Computes values of aggregates
-        all_agg_val = np.dot(all_val, all_agg)
+        all_agg_val = compute_subset_sums(all_val)
 
         # Returns computed data structures
         return txos, all_agg, all_agg_val
 
 
+    def _sort_txos(self, txos):
+        '''
+        Removes txos with null value and orders txos by decreasing value
+        Returns a list of txos
+        Parameters:
+            txos = list of txos (list of tuples (id, value))
+        '''
+        txos = filter(lambda x: x[1] > 0, txos)
+        return sorted(txos, key=lambda tup: tup[1], reverse=True)
+
+
     '''
     PROCESSING OF AGGREGATES
     '''
@@ -241,69 +472,91 @@ class TxosLinker(object):
         '''
         Matches input/output aggregates by values and returns a bunch of data structs
         '''
+        # Deferred import (sortedcontainers is only required by the computation of aggregates)
+        from sortedcontainers.sortedlist import SortedList
+
         self._all_match_in_agg = SortedList()
         self._match_in_agg_to_val = defaultdict(int)
         self._val_to_match_out_agg = defaultdict(set)
 
-        # Gets unique values of input / output aggregates
-        all_unique_in_agg_val, _ = np.unique(self._all_in_agg_val, return_inverse=True)
-        all_unique_out_agg_val, _ = np.unique(self._all_out_agg_val, return_inverse=True)
+        # Groups input / output aggregates by value (aggregates sorted by value + first index of each value)
+        in_order = np.argsort(self._all_in_agg_val, kind='stable')
+        in_vals, in_bounds = np.unique(self._all_in_agg_val[in_order], return_index=True)
+        out_order = np.argsort(self._all_out_agg_val, kind='stable')
+        out_vals, out_bounds = np.unique(self._all_out_agg_val[out_order], return_index=True)
+        in_bounds = np.append(in_bounds, len(in_order))
+        out_bounds = np.append(out_bounds, len(out_order))
 
-        # Computes total fees paid/receiver by taker/maker
+        # Computes the window of differences (in_val - out_val) allowed for a matching
         if self._has_intrafees:
             fees_taker = self._fees + self._fees_taker
             fees_maker = - self._fees_maker         # doesn't take into account tx fees paid by makers
+            min_diff = min(fees_maker, 0)
+            max_diff = max(fees_taker, 0)
+        else:
+            min_diff = 0
+            max_diff = self._fees
 
-        # Finds input and output aggregates with matching values
-        for in_agg_val in np.nditer(all_unique_in_agg_val):
-            val = int(in_agg_val)
-
-            for out_agg_val in np.nditer(all_unique_out_agg_val):
-
-                diff = in_agg_val - out_agg_val
+        # Finds the range of unique output values matching each unique input value
+        lo = np.searchsorted(out_vals, in_vals - max_diff, side='left')
+        hi = np.searchsorted(out_vals, in_vals - min_diff, side='right')
 
-                if (not self._has_intrafees) and (diff < 0):
-                    break
-                else:
-                    # Computes conditions required for a matching
-                    cond_no_intrafees = (not self._has_intrafees) and diff <= self._fees
-                    cond_intrafees = self._has_intrafees and\
-                                     ( (diff <= 0 and diff >= fees_maker) or (diff >= 0 and diff <= fees_taker) )
+        for k in np.nonzero(hi > lo)[0]:
+            val = int(in_vals[k])
 
-                    if cond_no_intrafees or cond_intrafees:
-                        # Registers the matching input aggregate
-                        match_in_agg = np.where(self._all_in_agg_val == in_agg_val)[0]
+            # Registers the matching input aggregates
+            match_in_agg = in_order[in_bounds[k]:in_bounds[k+1]].tolist()
+            self._all_match_in_agg.update(match_in_agg)
+            for in_idx in match_in_agg:
+                self._match_in_agg_to_val[in_idx] = val
 
-                        for in_idx in match_in_agg:
-                            if not in_idx in self._all_match_in_agg:
-                                self._all_match_in_agg.add(in_idx)
-                                self._match_in_agg_to_val[in_idx] = val
+            # Registers the matching output aggregates
+            match_out_agg = out_order[out_bounds[lo[k]]:out_bounds[hi[k]]]
+            self._val_to_match_out_agg[val].update(match_out_agg.tolist())
 
-                        # Registers the matching output aggregate
-                        match_out_agg = np.where(self._all_out_agg_val == out_agg_val)[0]
-                        self._val_to_match_out_agg[val].update(match_out_agg.tolist())
+        self._add_counters('match_agg_by_val', nb_match_in_aggs=len(self._all_match_in_agg))
 
 
     def _compute_in_agg_cmbn(self):
         '''
         Computes a matrix of valid combinations (pairs) of input aggregates
-        Returns a dictionary (parent_agg => (child_agg1, child_agg2))
+        Stores the matrix in a compressed (CSR) layout:
+            _in_agg_cmbn_ofs   = array of offsets indexed by parent aggregate
+            _in_agg_cmbn_pairs = array of pairs (child_agg1, child_agg2)
+        Pairs of parent_agg are stored in _in_agg_cmbn_pairs[ofs[parent_agg]:ofs[parent_agg+1]]
+        sorted by increasing child_agg1 (and thus by decreasing child_agg2)
         We have a valid combination (agg1, agg2) if:
            R1/ child_agg1 & child_agg2 = 0 (no bitwise overlap)
            R2/ child_agg1 > child_agg2 (matrix is symmetric)
         '''
-        aggs = self._all_match_in_agg[1:-1]
+        aggs = np.array(self._all_match_in_agg[1:-1], dtype=np.int64)
         tgt = self._all_match_in_agg[-1]
-        mat = defaultdict(list)
-        saggs = set(aggs)
-
-        for i in range(0, tgt+1):
-            if i in saggs:
-                j_max = min(i, tgt - i + 1)
-                for j in range(0, j_max):
-                    if (i & j == 0) and (j in saggs):
-                        mat[i+j].append( (i,j) )
-        self._mat_in_agg_cmbn = mat
+        nb_parents = len(self._all_in_agg_val)
+
+        # Joins the (sorted) set of matched aggregates with itself, by chunks of left members
+        # For each i, candidates j are the matched aggregates such that j < i, i & j = 0 and i + j <= tgt
+        l_i = []
+        l_j = []
+        chunk_size = 256
+        for k in range(0, len(aggs), chunk_size):
+            i = aggs[k:k+chunk_size][:,np.newaxis]
+            j = aggs[np.newaxis,:k+chunk_size]
+            valid = (j < i) & (i & j == 0) & (j < tgt - i + 1)
+            rows, cols = np.nonzero(valid)
+            l_i.append(i[rows,0])
+            l_j.append(j[0,cols])
+        all_i = np.concatenate(l_i) if l_i else np.zeros(0, dtype=np.int64)
+        all_j = np.concatenate(l_j) if l_j else np.zeros(0, dtype=np.int64)
+
+        # Sorts pairs by parent aggregate, then by increasing child_agg1
+        parents = all_i + all_j
+        order = np.lexsort((all_i, parents))
+        counts = np.bincount(parents, minlength=nb_parents)
+
+        self._in_agg_cmbn_ofs = np.zeros(nb_parents + 1, dtype=np.int64)
+        np.cumsum(counts, out=self._in_agg_cmbn_ofs[1:])
+        self._in_agg_cmbn_pairs = np.stack((all_i[order], all_j[order]), axis=1)
+        self._add_counters('compute_in_agg_cmbn', nb_pairs=len(self._in_agg_cmbn_pairs))
 
 
     '''
@@ -317,18 +570,33 @@ class TxosLinker(object):
         nb_ins = len(self.inputs)
         nb_outs = len(self.outputs)
 
-        shape = (nb_outs, nb_ins)
-        mat_cmbn = np.zeros(shape, dtype=np.int64)
-
-        shape = (1, nb_ins)
-        in_cmbn = np.zeros(shape, dtype=np.int64)
+        # Gets the matched input aggregates and the index of their value
+        nb_in_aggs = len(self._match_in_agg_to_val)
+        in_aggs = np.fromiter(self._match_in_agg_to_val.keys(), dtype=np.int64, count=nb_in_aggs)
+        in_vals = np.fromiter(self._match_in_agg_to_val.values(), dtype=np.int64, count=nb_in_aggs)
+        vals, val_idx = np.unique(in_vals, return_inverse=True)
+
+        # Computes the sums of the bits of the input aggregates matching each value (by chunks of aggregates)
+        in_bits = np.zeros((len(vals), nb_ins), dtype=np.int64)
+        chunk_size = 2**16
+        for k in range(0, nb_in_aggs, chunk_size):
+            np.add.at(in_bits, val_idx[k:k+chunk_size], self._get_aggs_bits(in_aggs[k:k+chunk_size], nb_ins))
+
+        # Computes the sums of the bits and the number of the output aggregates matching each value
+        out_bits = np.zeros((len(vals), nb_outs), dtype=np.int64)
+        nb_out_aggs = np.zeros(len(vals), dtype=np.int64)
+        for (v, val) in enumerate(vals.tolist()):
+            match_out_agg = self._val_to_match_out_agg[val]
+            out_aggs = np.fromiter(match_out_agg, dtype=np.int64, count=len(match_out_agg))
+            out_bits[v] = self._get_aggs_bits(out_aggs, nb_outs).sum(axis=0)
+            nb_out_aggs[v] = len(out_aggs)
 
         # Computes a matrix storing numbers of raw combinations matching input/output pairs
         # Also computes sum of combinations along inputs axis to get the number of combinations
-        for (in_idx, val) in self._match_in_agg_to_val.items():
-            for out_idx in self._val_to_match_out_agg[val]:
-                mat_cmbn += self._get_link_cmbn(in_idx, out_idx)
-                in_cmbn += self._all_in_agg[:,in_idx][np.newaxis,:]
+        # Each matched pair of aggregates (in_agg, out_agg) with a same value contributes bits(out_agg) x bits(in_agg).
+        # Summed over all pairs of a value, it's the outer product of the sums of bits of the aggregates of this value.
+        mat_cmbn = np.dot(out_bits.T, in_bits)
+        in_cmbn = np.dot(nb_out_aggs, in_bits)[np.newaxis,:]
 
         # Builds a list of sets storing inputs having a deterministic link with an output
         nb_cmbn = in_cmbn[0,0]
@@ -345,33 +613,191 @@ class TxosLinker(object):
         Implements a depth-first traversal of the inputs combinations tree (right to left)
         For each input combination we compute the matching output combinations.
         This is a basic brute-force solution. Will have to find a better method later.
+        If several workers are allowed, subtrees of the root task are processed in parallel (@see _run_dfs_parallel).
+        '''
+        itgt = 2 ** len(self.inputs) - 1
+        nb_root_cmbn = self._in_agg_cmbn_ofs[itgt+1] - self._in_agg_cmbn_ofs[itgt]
+
+        # Sets the deadline
+        deadline = self._get_deadline()
+
+        if (self._workers > 1) and (nb_root_cmbn > 1):
+            res = self._run_dfs_parallel(deadline)
+        else:
+            res = self._run_dfs(deadline, resume=self._load_checkpoint())
+
+        if res is None:
+            self.complete = False
+            return 0, None
+        nb_tx_cmbn, d_links, self.complete = res
+
+        # Fills the matrix
+        links = self._fill_link_matrix(*d_links.unpack())
+        nb_tx_cmbn += 1
+
+        return nb_tx_cmbn, links
+
+
+    def _run_dfs_parallel(self, deadline):
+        '''
+        Runs the depth-first traversal with a pool of processes
+        Each valid decomposition of the root task is an independent subtree processed as a separate job.
+        Jobs are pulled from a shared queue by idle workers, so that workers processing
+        small subtrees move on to the remaining ones while a large subtree is still processed.
+        Returns the results of _run_dfs() merged over all subtrees, or None if max duration is reached
+        (or the partial results of the subtrees processed so far if the ANYTIME option is set)
+        Parameters:
+            deadline = deadline of the computation (@see _get_deadline)
+        '''
+        # Deferred import (pools of processes are only used if workers > 1)
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+        itgt = 2 ** len(self.inputs) - 1
+        nb_root_cmbn = int(self._in_agg_cmbn_ofs[itgt+1] - self._in_agg_cmbn_ofs[itgt])
+
+        # Data structures required by workers
+        state = {
+            'inputs': self.inputs,
+            'outputs': self.outputs,
+            '_max_duration': self._max_duration,
+            '_options': self._options,
+            '_in_agg_cmbn_ofs': self._in_agg_cmbn_ofs,
+            '_in_agg_cmbn_pairs': self._in_agg_cmbn_pairs,
+            '_match_in_agg_to_val': self._match_in_agg_to_val,
+            '_val_to_match_out_agg': self._val_to_match_out_agg
+        }
+
+        nb_tx_cmbn = 0
+        d_links = PackedLinks(len(self.outputs))
+        complete = True
+
+        # Cancellation token shared with workers
+        worker_cancel = multiprocessing.Event()
+
+        with ProcessPoolExecutor(max_workers=self._workers, initializer=_init_dfs_worker, initargs=(state, worker_cancel)) as executor:
+            pending = set([executor.submit(_run_dfs_job, deadline, (i, i+1)) for i in range(0, nb_root_cmbn)])
+            while pending:
+                done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                l_res = [job.result() for job in done]
+                # Jobs return None if they're interrupted (unless the ANYTIME option is set)
+                interrupted = None in l_res
+                # Merges partial results
+                for res in l_res:
+                    if res is not None:
+                        nb_tx_cmbn += res[0]
+                        d_links.update(res[1])
+                        complete = complete and res[2]
+                if not interrupted:
+                    if self._progress is not None:
+                        self._progress(None, None, 1 - len(pending) / nb_root_cmbn)
+                    if not self._is_interrupted(deadline):
+                        continue
+                # Max duration reached or computation cancelled. Cancels pending jobs and stops running jobs
+                worker_cancel.set()
+                for job in pending:
+                    job.cancel()
+                if self.ANYTIME not in self._options:
+                    return None
+                # Merges the partial results returned by running jobs (lower bounds of their results)
+                for job in wait(pending)[0]:
+                    if not job.cancelled():
+                        res = job.result()
+                        nb_tx_cmbn += res[0]
+                        d_links.update(res[1])
+                return nb_tx_cmbn, d_links, False
+
+        return nb_tx_cmbn, d_links, complete
+
+
+    def _run_dfs(self, deadline, root_range=None, resume=None):
+        '''
+        Runs the depth-first traversal of the inputs combinations tree
+        Returns a tuple storing:
+            the number of combinations of the root task (excluding the root combination)
+            the links { (in_agg, out_agg) => number of combinations } (@see PackedLinks)
+            a flag indicating if the traversal has been completed
+        If max duration is reached or if the computation is cancelled, returns None (or partial results if the ANYTIME option is set)
+        Parameters:
+            deadline   = deadline of the computation (@see _get_deadline)
+            root_range = tuple (first, last+1) restricting the decompositions of the root task to be processed
+                         (all decompositions are processed if None)
+            resume     = tuple (stack, d_links) storing the state of an interrupted traversal (@see _load_checkpoint)
+        Notes:
+        If a checkpoint file has been defined and if all the decompositions of the root task are processed,
+        the state of the traversal is saved into the checkpoint file when max duration is reached.
         '''
         nb_tx_cmbn = 0
         itgt = 2 ** len(self.inputs) - 1
         otgt = 2 ** len(self.outputs) - 1
-        d_links = defaultdict(int)
+        d_links = PackedLinks(len(self.outputs))
+
+        # Gets the matrix of valid combinations of input aggregates (as python lists for fast indexing)
+        cmbn_ofs = self._in_agg_cmbn_ofs.tolist()
+        cmbn_pairs = self._in_agg_cmbn_pairs.tolist()
+
+        # Gets the values of matched input aggregates
+        # and a cache of the output aggregates matching each value as sorted arrays (@see _match_out_cmbn)
+        match_in_agg_to_val = self._match_in_agg_to_val
+        out_agg_arrs = {}
+
+        # Restricts the decompositions of the root task
+        # (the root aggregate is never the right input aggregate of another task)
+        root_idx = 0
+        if root_range is not None:
+            root_idx = root_range[0]
+            cmbn_ofs[itgt+1] = min(cmbn_ofs[itgt+1], cmbn_ofs[itgt] + root_range[1])
 
         # Initializes a stack of tasks & sets the initial task
         #  0: index used to resume the processing of the task (required for depth-first algorithm)
         #  1: il = left input aggregate
         #  2: ir = right input aggregate
         #  3: d_out = outputs combination matching with current input combination
-        #             dictionary of dictionary :  { or =>  { ol => (nb_parents_cmbn, nb_children_cmbn) } }
-        stack = deque()
-        ini_d_out = defaultdict(dict)
-        ini_d_out[otgt] = { 0: (1, 0) }
-        stack.append( (0, 0, itgt, ini_d_out) )
+        #             frame of entries (or, ol, nb_parents_cmbn) and of nb_children_cmbn of each or (@see dfs_frame)
+        if resume is not None:
+            stack, d_links = resume
+        else:
+            stack = deque()
+            ini_d_out = DfsFrame({ otgt: [1, 0, { 0: 1 }] })
+            stack.append( (root_idx, 0, itgt, ini_d_out) )
+
+        # Checks if the state of the traversal can be saved
+        use_checkpoint = (self._checkpoint is not None) and (root_range is None)
+
+        # Work counters (number of tasks pushed on the stack, max depth of the stack)
+        nb_nodes = 0
+        max_depth = len(stack)
+
+        # Number of decompositions of the root task to be processed (used to estimate the progress)
+        nb_root_cmbn = cmbn_ofs[itgt+1] - cmbn_ofs[itgt] - root_idx
 
-        # Sets start date/hour
-        start_time = datetime.now()
+        # Number of iterations before the next check (the first iteration is checked)
+        next_check = 1
 
         # Iterates over all valid inputs combinations (top->down)
         while len(stack) > 0:
-            # Checks duration
-            curr_time = datetime.now()
-            delta_time = curr_time - start_time
-            if delta_time.total_seconds() >= self._max_duration:
-                return 0, None
+            # Checks duration and cancellation (every CHECK_INTERVAL iterations)
+            next_check -= 1
+            if next_check == 0:
+                next_check = self.CHECK_INTERVAL
+                if self._progress is not None:
+                    self._progress(nb_nodes, len(stack), self._get_dfs_progress(stack, cmbn_ofs, root_idx, nb_root_cmbn))
+                interrupted = self._is_interrupted(deadline)
+            else:
+                interrupted = False
+            if interrupted:
+                if use_checkpoint:
+                    self._save_checkpoint(stack, d_links)
+                self._add_counters('compute_link_matrix', nodes=nb_nodes, max_stack_depth=max_depth)
+                if self.ANYTIME not in self._options:
+                    return None
+                # Pops all remaining tasks. Combinations found so far are back-propagated to the root task.
+                # It provides a lower bound of the number of combinations and partial numbers of links.
+                while len(stack) > 0:
+                    res = self._pop_dfs_task(stack, d_links, otgt)
+                    if res is not None:
+                        nb_tx_cmbn = res
+                return nb_tx_cmbn, d_links, False
 
             # Gets data from task
             t = stack[-1]
@@ -382,50 +808,33 @@ class TxosLinker(object):
             n_idx_il = idx_il
 
             # Gets all valid decompositions of right input aggregate
-            ircs = self._mat_in_agg_cmbn[ir]
-            len_ircs = len(ircs)
+            ircs_ofs = cmbn_ofs[ir]
+            len_ircs = cmbn_ofs[ir+1] - ircs_ofs
 
             for i in range(idx_il, len_ircs):
 
                 n_idx_il = i
-                n_d_out = defaultdict(dict)
 
                 # Gets left input sub-aggregate (column from ircs)
-                n_il = ircs[i][1]
+                n_il = cmbn_pairs[ircs_ofs + i][1]
 
                 # Checks if we must process this pair (columns from ircs are sorted in decreasing order)
                 if n_il > il:
                     # Gets the right input sub-aggregate (row from ircs)
-                    n_ir = ircs[i][0]
-
-                    # Iterates over outputs combinations previously found
-                    for o_r in d_out:
-                        sol = otgt - o_r
-                        # Computes the number of parent combinations
-                        nb_prt = sum([s[0] for s in d_out[o_r].values()])
-
-                        # Iterates over output sub-aggregates matching with left input sub-aggregate
-                        val_il = self._match_in_agg_to_val[n_il]
-                        for n_ol in self._val_to_match_out_agg[val_il]:
-
-                            # Checks compatibility of output sub-aggregate with left part of output combination
-                            if (sol & n_ol == 0):
-                                # Computes:
-                                #   the sum corresponding to the left part of the output combination
-                                #   the complementary right output sub-aggregate
-                                n_sol = sol + n_ol
-                                n_or = otgt - n_sol
-                                # Checks if the right output sub-aggregate is valid
-                                val_ir = self._match_in_agg_to_val[n_ir]
-                                match_out_agg = self._val_to_match_out_agg[val_ir]
-                                # Adds this output combination into n_d_out if all conditions met
-                                if (n_sol & n_or == 0) and (n_or in match_out_agg):
-                                    n_d_out[n_or][n_ol] = (nb_prt, 0)
+                    n_ir = cmbn_pairs[ircs_ofs + i][0]
+
+                    # Computes the output combinations matching with the left/right input sub-aggregates
+                    val_il = match_in_agg_to_val[n_il]
+                    val_ir = match_in_agg_to_val[n_ir]
+                    n_d_out = self._match_out_cmbn(d_out, otgt, val_il, val_ir, out_agg_arrs)
 
                     # Updates idx_il for the current task
                     stack[-1] = (i + 1, il, ir, d_out)
                     # Pushes a new task which will decompose the right input aggregate
                     stack.append( (0, n_il, n_ir, n_d_out) )
+                    nb_nodes += 1
+                    if len(stack) > max_depth:
+                        max_depth = len(stack)
                     # Executes the new task (depth-first)
                     break
 
@@ -437,46 +846,406 @@ class TxosLinker(object):
             # Checks if task has completed
             if n_idx_il > len_ircs - 1:
                 # Pops the current task
-                t = stack.pop()
-                il = t[1]
-                ir = t[2]
-                d_out = t[3]
+                res = self._pop_dfs_task(stack, d_links, otgt)
+                if res is not None:
+                    nb_tx_cmbn = res
 
-                # Checks if it's the root task
-                if len(stack) == 0:
-                    # Retrieves the number of combinations from root task
-                    nb_tx_cmbn = d_out[otgt][0][1]
+        if use_checkpoint:
+            self._clear_checkpoint()
+
+        self._add_counters('compute_link_matrix', nodes=nb_nodes, max_stack_depth=max_depth)
+        return nb_tx_cmbn, d_links, True
 
-                else:
-                    # Gets parent task
-                    p_t = stack[-1]
-                    p_d_out = p_t[3]
-
-                    # Iterates over all entries from d_out
-                    for (o_r, l_ol) in d_out.items():
-                        r_key = (ir, o_r)
-                        # Iterates over all left aggregates
-                        for (ol, (nb_prnt, nb_chld)) in l_ol.items():
-                            l_key = (il, ol)
-                            # Updates the dictionary of links for the pair of aggregates
-                            nb_occur = nb_chld + 1
-                            d_links[r_key] += nb_prnt
-                            d_links[l_key] += nb_prnt * nb_occur
-                            # Updates parent d_out by back-propagating number of child combinations
-                            p_or = ol + o_r
-                            p_l_ol = p_d_out[p_or]
-                            for (p_ol, (p_nb_prt, p_nb_chld)) in p_l_ol.items():
-                                p_d_out[p_or][p_ol] = (p_nb_prt, p_nb_chld + nb_occur)
+
+    def _match_out_cmbn(self, d_out, otgt, val_il, val_ir, out_agg_arrs):
+        '''
+        Computes the output combinations matching with a decomposition (n_il, n_ir) of the right input aggregate of a task
+        Returns the frame of the child task (@see dfs_frame)
+        For each entry o_r of the frame, a pair (n_ol, n_or) is valid if:
+            n_ol is compatible with the left part of the output combination (n_ol is a subset of o_r)
+            n_or = o_r - n_ol matches with the right input sub-aggregate
+        (n_or and n_ol + otgt - o_r never overlap as n_or is their complement)
+        Small numbers of candidate pairs are filtered one by one.
+        Large numbers of candidate pairs (at least MIN_VECTORIZED_SIZE) are filtered at once
+        with bitwise operations and lookups in sorted arrays.
+        Parameters:
+            d_out        = frame of the task
+            otgt         = output aggregate containing all outputs
+            val_il       = value of the left input sub-aggregate
+            val_ir       = value of the right input sub-aggregate
+            out_agg_arrs = dictionary { value => sorted array of matching output aggregates } (filled on demand)
+        '''
+        match_out_agg_il = self._val_to_match_out_agg[val_il]
+        match_out_agg_ir = self._val_to_match_out_agg[val_ir]
+        grp_ors, grp_prts = d_out.get_groups()
+
+        if len(grp_ors) * len(match_out_agg_il) < self.MIN_VECTORIZED_SIZE:
+            groups = {}
+            for (o_r, nb_prt) in zip(grp_ors, grp_prts):
+                sol = otgt - o_r
+                for n_ol in match_out_agg_il:
+                    # Checks compatibility of output sub-aggregate with left part of output combination
+                    if (sol & n_ol == 0):
+                        # Checks if the complementary right output sub-aggregate is valid
+                        n_or = o_r - n_ol
+                        if n_or in match_out_agg_ir:
+                            grp = groups.get(n_or)
+                            if grp is None:
+                                grp = groups[n_or] = [0, 0, {}]
+                            grp[0] += nb_prt
+                            grp[2][n_ol] = nb_prt
+            return DfsFrame(groups)
+
+        for val in (val_il, val_ir):
+            if val not in out_agg_arrs:
+                out_agg_arrs[val] = np.array(sorted(self._val_to_match_out_agg[val]), dtype=np.int64)
+        out_aggs_l = out_agg_arrs[val_il]
+        out_aggs_r = out_agg_arrs[val_ir]
+        if len(out_aggs_r) == 0:
+            return DfsFrame({})
+        grp_ors = np.array(grp_ors, dtype=np.int64)
+        grp_prts = np.array(grp_prts, dtype=np.int64)
+
+        l_grp = []
+        l_ol = []
+        l_or = []
+
+        # Processes the groups of the frame by chunks (bounds the size of temporary arrays to ~1M cells)
+        chunk_size = max(1, 2**20 // len(out_aggs_l))
+        for k in range(0, len(grp_ors), chunk_size):
+            ors = grp_ors[k:k+chunk_size, np.newaxis]
+            # Checks compatibility of output sub-aggregates with left parts of output combinations
+            rows, cols = np.nonzero(((otgt - ors) & out_aggs_l[np.newaxis,:]) == 0)
+            n_ols = out_aggs_l[cols]
+            n_ors = ors[rows,0] - n_ols
+            # Checks if the right output sub-aggregates are valid
+            pos = np.minimum(np.searchsorted(out_aggs_r, n_ors), len(out_aggs_r) - 1)
+            valid = out_aggs_r[pos] == n_ors
+            l_grp.append(rows[valid] + k)
+            l_ol.append(n_ols[valid])
+            l_or.append(n_ors[valid])
+
+        grps = np.concatenate(l_grp)
+        return new_frame(np.concatenate(l_or), np.concatenate(l_ol), grp_prts[grps])
+
+
+    def _get_dfs_progress(self, stack, cmbn_ofs, root_idx, nb_root_cmbn):
+        '''
+        Estimates the fraction of the decompositions of the root task processed by the depth-first traversal
+        (decompositions of the root task done + fraction of the decompositions of the current child task done)
+        Parameters:
+            stack        = stack of tasks of the traversal
+            cmbn_ofs     = offsets of the decompositions of input aggregates (@see _compute_in_agg_cmbn)
+            root_idx     = index of the first decomposition of the root task to be processed
+            nb_root_cmbn = number of decompositions of the root task to be processed
+        '''
+        if nb_root_cmbn <= 0:
+            return 1.0
+        # Index of the next decomposition of the root task (the current one is processed by the child task)
+        nb_done = stack[0][0] - root_idx
+        if len(stack) > 1:
+            nb_done -= 1
+            ir = stack[1][2]
+            nb_child_cmbn = cmbn_ofs[ir+1] - cmbn_ofs[ir]
+            if nb_child_cmbn > 0:
+                nb_done += min(1.0, stack[1][0] / nb_child_cmbn)
+        return max(0.0, min(1.0, nb_done / nb_root_cmbn))
+
+
+    def _pop_dfs_task(self, stack, d_links, otgt):
+        '''
+        Pops the task at the top of the stack of the depth-first traversal
+        and back-propagates its results to its parent task
+        Returns the number of combinations of the root task (excluding the root combination) if the root task is popped
+        or None otherwise
+        Parameters:
+            stack   = stack of tasks of the traversal
+            d_links = links accumulated by the traversal (@see PackedLinks)
+            otgt    = output aggregate containing all outputs
+        '''
+        t = stack.pop()
+        il = t[1]
+        ir = t[2]
+        d_out = t[3]
+
+        # Checks if it's the root task
+        if len(stack) == 0:
+            # Retrieves the number of combinations from root task (single entry (otgt, 0))
+            return d_out.get_nb_chld(otgt)
+
+        # Updates the links for the pairs of aggregates
+        #   (ir, or) => sum of the numbers of parent combinations of the group or
+        #   (il, ol) => nb_parents_cmbn * (nb_children_cmbn + 1)
+        d_out.add_links(d_links, il, ir)
+
+        # Updates parent d_out by back-propagating number of child combinations
+        stack[-1][3].add_children(d_out)
+
+        return None
+
+
+    def _compute_link_matrix_memo(self):
+        '''
+        Computes the linkability matrix (memoized engine)
+        Returns the number of possible combinations and the links matrix
+        Results are identical to _compute_link_matrix() but each subproblem is solved once.
+        '''
+        res = self._run_memo()
+        if res is None:
+            self.complete = False
+            return 0, None
+        nb_tx_cmbn, d_links = res
 
         # Fills the matrix
-        links = self._get_link_cmbn(itgt, otgt)
-        nb_tx_cmbn += 1
-        for (lnk, mult) in d_links.items():
-            links = links + self._get_link_cmbn(lnk[0], lnk[1]) * mult
+        nb_links = len(d_links)
+        in_aggs = np.fromiter((lnk[0] for lnk in d_links), dtype=np.int64, count=nb_links)
+        out_aggs = np.fromiter((lnk[1] for lnk in d_links), dtype=np.int64, count=nb_links)
+        mults = np.fromiter(d_links.values(), dtype=np.int64, count=nb_links)
+        links = self._fill_link_matrix(in_aggs, out_aggs, mults)
 
         return nb_tx_cmbn, links
 
 
+    def _run_memo(self, base=1):
+        '''
+        Runs the memoized engine
+        Returns a tuple (number of combinations, dictionary { (in_agg, out_agg) => number of combinations })
+        or None if max duration has been reached
+        A subproblem is defined by:
+            ir  = remaining input aggregate
+            o_r = remaining output aggregate
+            end = bound on the decompositions of ir which can still be used
+                  (decompositions with a left input sub-aggregate greater than the last left input sub-aggregate)
+        A first pass (top-down, memoized) computes the number of combinations of each subproblem.
+        A second pass propagates the number of parent combinations of each subproblem (largest ir first)
+        and derives the number of combinations associated to each pair of input/output aggregates.
+        Parameters:
+            base = weight of a block. A combination made of k blocks is counted as base**(k-1).
+                   With base = 2**B (B large enough), numbers of combinations made of k blocks
+                   are stored in distinct ranges of B bits of the results (@see _compute_link_matrix_components)
+        '''
+        itgt = 2 ** len(self.inputs) - 1
+        otgt = 2 ** len(self.outputs) - 1
+
+        # Gets the matrix of valid combinations of input aggregates (as python lists for fast indexing)
+        cmbn_ofs = self._in_agg_cmbn_ofs.tolist()
+        cmbn_pairs = self._in_agg_cmbn_pairs.tolist()
+        # Left input sub-aggregates (negated) are sorted in increasing order for each parent aggregate
+        cmbn_neg_il = [-p[1] for p in cmbn_pairs]
+
+        match_in_agg_to_val = self._match_in_agg_to_val
+        val_to_match_out_agg = self._val_to_match_out_agg
+
+        # memo  = { (end, ir, o_r) => number of combinations of the subproblem }
+        # edges = { (end, ir, o_r) => list of (child subproblem, il, ol) }
+        memo = dict()
+        edges = dict()
+
+        # Sets the deadline
+        deadline = self._get_deadline()
+
+        def count(key):
+            end, ir, o_r = key
+            nb_cmbn = 1
+            l_edges = []
+            for i in range(cmbn_ofs[ir], end):
+                n_ir, n_il = cmbn_pairs[i]
+                match_out_agg = val_to_match_out_agg[match_in_agg_to_val[n_ir]]
+                # Bound on decompositions of n_ir (left input sub-aggregates must be greater than n_il)
+                n_end = bisect_left(cmbn_neg_il, -n_il, cmbn_ofs[n_ir], cmbn_ofs[n_ir+1])
+                for n_ol in val_to_match_out_agg[match_in_agg_to_val[n_il]]:
+                    n_or = o_r - n_ol
+                    # Checks that n_ol is a sub-aggregate of o_r and that the complementary aggregate is valid
+                    if (n_ol & o_r == n_ol) and (n_or in match_out_agg):
+                        n_key = (n_end, n_ir, n_or)
+                        n_nb_cmbn = memo.get(n_key)
+                        if n_nb_cmbn is None:
+                            n_nb_cmbn = count(n_key)
+                        nb_cmbn += base * n_nb_cmbn
+                        l_edges.append( (n_key, n_il, n_ol) )
+            memo[key] = nb_cmbn
+            edges[key] = l_edges
+            # Checks duration and cancellation
+            if len(memo) % 1000 == 0:
+                if self._is_interrupted(deadline):
+                    raise TimeoutError()
+            return nb_cmbn
+
+        root = (cmbn_ofs[itgt+1], itgt, otgt)
+        try:
+            nb_tx_cmbn = count(root)
+        except TimeoutError:
+            return None
+
+        # Propagates the number of parent combinations (subproblems with largest ir first)
+        d_links = defaultdict(int)
+        nb_prt = defaultdict(int)
+        nb_prt[root] = 1
+        for key in sorted(edges, key=lambda k: k[1], reverse=True):
+            p_nb_prt = nb_prt[key]
+            if key != root:
+                # Combinations for which the subproblem isn't decomposed further
+                d_links[(key[1], key[2])] += p_nb_prt
+            for (n_key, n_il, n_ol) in edges[key]:
+                nb_prt[n_key] += base * p_nb_prt
+                d_links[(n_il, n_ol)] += base * p_nb_prt * memo[n_key]
+
+        return nb_tx_cmbn, d_links
+
+
+    def _compute_link_matrix_multiset(self):
+        '''
+        Computes the linkability matrix (multiset engine)
+        Returns the number of possible combinations and the links matrix
+        Txos with same value are grouped into classes and a subproblem is defined by the numbers of remaining txos
+        of each class (ir = tuple of numbers of inputs, o_r = tuple of numbers of outputs).
+        The block storing the first remaining input of the first nonempty input class is chosen first.
+        A block is defined by the numbers of txos taken from each class (il, ol) and is counted once for each choice
+        of txos among the remaining txos of the classes (product of binomial coefficients).
+        A first pass (top-down, memoized) computes the number of combinations of each subproblem.
+        A second pass propagates the number of parent combinations of each subproblem (largest ir first),
+        derives the number of links between input/output classes and expands them into the linkability matrix
+        (txos of a same class have the same links).
+        '''
+        in_vals, in_mult = self._get_classes(self.inputs)
+        out_vals, out_mult = self._get_classes(self.outputs)
+        nb_in_cls = len(in_vals)
+        nb_out_cls = len(out_vals)
+
+        # Computes all multisets of outputs sorted by value (tuples (value, numbers of outputs per class))
+        out_multisets = sorted([(sum([k*v for (k, v) in zip(ol, out_vals)]), ol) for ol in itertools.product(*[range(m+1) for m in out_mult])])
+        out_ms_vals = [ms[0] for ms in out_multisets]
+
+        # memo  = { (ir, o_r) => number of combinations of the subproblem }
+        # edges = { (ir, o_r) => list of (child subproblem, il, ol, number of choices of txos) }
+        memo = dict()
+        edges = dict()
+
+        # Sets the deadline
+        deadline = self._get_deadline()
+
+        def count(key):
+            ir, o_r = key
+            nb_cmbn = 0
+            l_edges = []
+            # First nonempty input class
+            c0 = next(c for c in range(nb_in_cls) if ir[c] > 0)
+            ranges = [range(1, ir[c]+1) if c == c0 else range(0, ir[c]+1) for c in range(nb_in_cls)]
+            for il in itertools.product(*ranges):
+                n_ir = tuple([r - k for (r, k) in zip(ir, il)])
+                il_val = sum([k*v for (k, v) in zip(il, in_vals)])
+                # Number of choices of inputs (the first input of class c0 belongs to the block)
+                il_nb = comb(ir[c0]-1, il[c0]-1)
+                for c in range(nb_in_cls):
+                    if c != c0:
+                        il_nb *= comb(ir[c], il[c])
+                for k in range(bisect_left(out_ms_vals, il_val - self._fees), bisect_right(out_ms_vals, il_val)):
+                    ol = out_multisets[k][1]
+                    if any([l > r for (l, r) in zip(ol, o_r)]):
+                        continue
+                    n_or = tuple([r - l for (r, l) in zip(o_r, ol)])
+                    if not any(n_ir):
+                        if any(n_or):
+                            continue
+                        n_nb_cmbn = 1
+                    else:
+                        n_key = (n_ir, n_or)
+                        n_nb_cmbn = memo.get(n_key)
+                        if n_nb_cmbn is None:
+                            n_nb_cmbn = count(n_key)
+                        if n_nb_cmbn == 0:
+                            continue
+                    nb_choices = il_nb
+                    for d in range(nb_out_cls):
+                        nb_choices *= comb(o_r[d], ol[d])
+                    nb_cmbn += nb_choices * n_nb_cmbn
+                    l_edges.append( ((n_ir, n_or), il, ol, nb_choices) )
+            memo[key] = nb_cmbn
+            edges[key] = l_edges
+            # Checks duration and cancellation
+            if len(memo) % 1000 == 0:
+                if self._is_interrupted(deadline):
+                    raise TimeoutError()
+            return nb_cmbn
+
+        root = (tuple(in_mult), tuple(out_mult))
+        try:
+            nb_tx_cmbn = count(root)
+        except TimeoutError:
+            self.complete = False
+            return 0, None
+
+        # Propagates the number of parent combinations (subproblems with largest ir first)
+        # and computes the number of links between input/output classes
+        cls_links = np.zeros((nb_out_cls, nb_in_cls), dtype=object)
+        nb_prt = defaultdict(int)
+        nb_prt[root] = 1
+        for key in sorted(edges, key=lambda k: sum(k[0]), reverse=True):
+            p_nb_prt = nb_prt[key]
+            for (n_key, il, ol, nb_choices) in edges[key]:
+                n_nb_prt = p_nb_prt * nb_choices
+                n_nb_cmbn = 1
+                if any(n_key[0]):
+                    nb_prt[n_key] += n_nb_prt
+                    n_nb_cmbn = memo[n_key]
+                cls_links += np.outer(np.array(ol, dtype=object), np.array(il, dtype=object)) * (n_nb_prt * n_nb_cmbn)
+
+        # Expands the links between classes into the matrix (links of a pair of classes are shared by all pairs of txos)
+        cls_links //= np.outer(np.array(out_mult, dtype=object), np.array(in_mult, dtype=object))
+        links = cls_links[np.repeat(np.arange(nb_out_cls), out_mult)][:, np.repeat(np.arange(nb_in_cls), in_mult)]
+        if nb_tx_cmbn < 2**63:
+            links = links.astype(np.int64)
+
+        return nb_tx_cmbn, links
+
+
+    def _get_classes(self, txos):
+        '''
+        Groups a list of txos sorted by value into classes of txos with same value
+        Returns:
+            list of values of the classes
+            list of numbers of txos of the classes
+        Parameters:
+            txos = list of txos sorted by value (list of tuples (id, value))
+        '''
+        vals = []
+        mult = []
+        for (_, val) in txos:
+            if vals and (vals[-1] == val):
+                mult[-1] += 1
+            else:
+                vals.append(val)
+                mult.append(1)
+        return vals, mult
+
+
+    def _fill_link_matrix(self, in_aggs, out_aggs, mults):
+        '''
+        Computes the linkability matrix from the number of combinations associated to pairs of aggregates
+        Returns a numpy array
+        Parameters:
+            in_aggs  = 1D array of input aggregates
+            out_aggs = 1D array of output aggregates
+            mults    = 1D array of numbers of combinations associated to the pairs (in_aggs[k], out_aggs[k])
+        Notes:
+        The matrix is computed as a single weighted product of the bits of the aggregates:
+            links = bits(out_aggs).T . (bits(in_aggs) * mults)
+        Pairs are processed by chunks in order to bound the size of the arrays of bits.
+        '''
+        nb_ins = len(self.inputs)
+        nb_outs = len(self.outputs)
+        self._add_counters('compute_link_matrix', nb_links=len(mults))
+        itgt = 2 ** nb_ins - 1
+        otgt = 2 ** nb_outs - 1
+        links = self._get_link_cmbn(itgt, otgt)
+        chunk_size = 2**16
+        for k in range(0, len(mults), chunk_size):
+            vouts = self._get_aggs_bits(out_aggs[k:k+chunk_size], nb_outs)
+            vins = self._get_aggs_bits(in_aggs[k:k+chunk_size], nb_ins) * mults[k:k+chunk_size,np.newaxis]
+            links += np.dot(vouts.T, vins)
+        return links
+
+
     def _get_link_cmbn(self, in_agg, out_agg):
         '''
         Computes a linkability matrix encoding the matching of given input/output aggregates
@@ -485,11 +1254,248 @@ class TxosLinker(object):
             in_agg     = input aggregate
             out_agg    = output aggregate
         '''
-        vouts = self._all_out_agg[:,out_agg][:,np.newaxis]
-        vins = self._all_in_agg[:,in_agg][np.newaxis,:]
+        vouts = self._get_agg_bits(out_agg, len(self.outputs))[:,np.newaxis]
+        vins = self._get_agg_bits(in_agg, len(self.inputs))[np.newaxis,:]
         return np.dot(vouts, vins)
 
 
+    def _get_agg_bits(self, agg, nb_txos):
+        '''
+        Decodes an aggregate into an array of 0/1 flags (one flag per txo)
+        Returns a numpy array
+        Parameters:
+            agg     = aggregate encoded as an integer bitmask
+            nb_txos = number of txos
+        '''
+        return (int(agg) >> np.arange(nb_txos, dtype=np.int64)) & 1
+
+
+    def _get_aggs_bits(self, aggs, nb_txos):
+        '''
+        Decodes an array of aggregates into a matrix of 0/1 flags (one row per aggregate, one column per txo)
+        Returns a numpy array
+        Parameters:
+            aggs    = 1D array of aggregates encoded as integer bitmasks
+            nb_txos = number of txos
+        '''
+        aggs = np.asarray(aggs, dtype=np.int64)
+        return (aggs[:,np.newaxis] >> np.arange(nb_txos, dtype=np.int64)[np.newaxis,:]) & 1
+
+
+    def _get_agg_dtype(self, nb_txos):
+        '''
+        Returns the smallest unsigned integer type able to store aggregates of nb_txos txos
+        Parameters:
+            nb_txos = number of txos
+        '''
+        if nb_txos <= 16:
+            return np.uint16
+        elif nb_txos <= 32:
+            return np.uint32
+        else:
+            return np.uint64
+
+
+    '''
+    COMPONENTS
+    '''
+    def _find_components(self):
+        '''
+        Splits the transaction into independent components (@see boltzmann.linker.components.find_components)
+        Returns a list of tuples (list of input indices, list of output indices) storing the components
+        or None if the tx can't be split or if a component has more than max_txos inputs or outputs
+        '''
+        if max(len(self.inputs), len(self.outputs)) > self.MAX_NB_TXOS_DECOMPOSE:
+            return None
+
+        inputs, _, in_sums = self._prepare_txos(self.inputs)
+        outputs, _, out_sums = self._prepare_txos(self.outputs)
+        components = find_components(in_sums, out_sums, self._fees)
+        if (components is None) or (len(components) < 2):
+            return None
+
+        res = []
+        for (in_agg, out_agg) in components:
+            ins = np.nonzero(self._get_agg_bits(in_agg, len(inputs)))[0].tolist()
+            outs = np.nonzero(self._get_agg_bits(out_agg, len(outputs)))[0].tolist()
+            if max(len(ins), len(outs)) > self.max_txos:
+                return None
+            res.append((ins, outs))
+
+        # Txos are sorted by decreasing value
+        self.inputs = inputs
+        self.outputs = outputs
+        return res
+
+
+    def _compute_link_matrix_components(self, components):
+        '''
+        Computes the linkability matrix of a tx split into independent components
+        Returns the number of possible combinations and the links matrix
+        Each component is processed by the memoized engine. Numbers of combinations of each component
+        are computed per number of blocks, with blocks weighted by a power of 2 (@see _run_memo).
+        Combinations of the tx are merges of combinations of the components (@see boltzmann.linker.components).
+        Parameters:
+            components = list of tuples (list of input indices, list of output indices)
+        '''
+        deadline = self._get_deadline()
+        nb_cpnts = len(components)
+
+        # l_nb_cmbn[g] = list storing the number of combinations of component g made of k blocks (index k)
+        # l_links[g]   = dict { (in_agg, out_agg) => list storing the number of combinations made of k blocks (index k) }
+        l_nb_cmbn = []
+        l_links = []
+        for (ins, outs) in components:
+            sub_ins = [self.inputs[i] for i in ins]
+            sub_outs = [self.outputs[o] for o in outs]
+            fees = sum([v[1] for v in sub_ins]) - sum([v[1] for v in sub_outs])
+            duration = deadline - monotonic()
+            linker = TxosLinker(sub_ins, sub_outs, fees, duration, self.max_txos, cancel=self._cancel)
+            linker.inputs = sub_ins
+            linker.outputs = sub_outs
+            linker._fees = fees
+            linker._has_intrafees = False
+            linker._prepare_data()
+            linker._match_agg_by_val()
+            linker._compute_in_agg_cmbn()
+
+            # Number of bits storing a number of combinations (bounded by nb_ins**(nb_ins+nb_outs))
+            nb_bits = (len(ins) + len(outs)) * max(1, len(ins).bit_length()) + 1
+            res = linker._run_memo(2**nb_bits)
+            if res is None:
+                self.complete = False
+                return 0, None
+            nb_cmbn, d_links = res
+            # Adds the combination made of a single block
+            d_links[(2**len(ins) - 1, 2**len(outs) - 1)] += 1
+
+            decode = lambda v: [0] + [(v >> (nb_bits * k)) & (2**nb_bits - 1) for k in range(0, len(ins))]
+            l_nb_cmbn.append(decode(nb_cmbn))
+            l_links.append({lnk: decode(mult) for (lnk, mult) in d_links.items()})
+
+        def merge_cpnts(excluded):
+            res = [1]
+            for g in range(0, nb_cpnts):
+                if g not in excluded:
+                    res = merge_nb_blocks(res, l_nb_cmbn[g])
+            return res
+
+        nb_tx_cmbn = sum(merge_cpnts([]))
+        links = np.zeros((len(self.outputs), len(self.inputs)), dtype=object)
+
+        for g, (ins, outs) in enumerate(components):
+            # Links between txos of a same component
+            nb_cmbn_rest = merge_cpnts([g])
+            nb_cmpl = [count_completions(k, nb_cmbn_rest) for k in range(0, len(l_nb_cmbn[g]))]
+            sub_links = np.zeros((len(outs), len(ins)), dtype=object)
+            for ((in_agg, out_agg), nb_cmbn) in l_links[g].items():
+                mult = sum([n * c for (n, c) in zip(nb_cmbn, nb_cmpl)])
+                vouts = self._get_agg_bits(out_agg, len(outs)).astype(object)
+                vins = self._get_agg_bits(in_agg, len(ins)).astype(object)
+                sub_links += np.outer(vouts, vins) * mult
+            links[np.ix_(outs, ins)] = sub_links
+
+            # Links between txos of 2 components
+            for h in range(g+1, nb_cpnts):
+                nb_linked = count_linked(l_nb_cmbn[g], l_nb_cmbn[h], merge_cpnts([g, h]))
+                links[np.ix_(outs, components[h][0])] = nb_linked
+                links[np.ix_(components[h][1], ins)] = nb_linked
+
+        if nb_tx_cmbn < 2**63:
+            links = links.astype(np.int64)
+
+        return nb_tx_cmbn, links
+
+
+    '''
+    CHECKPOINTS
+    '''
+    def _get_checkpoint_key(self):
+        '''
+        Computes a hash of the data defining the computation of the linkability matrix
+        Returns an hexadecimal string
+        '''
+        data = repr((self.CHECKPOINT_VERSION, self.inputs, self.outputs, self._fees, self._fees_maker, self._fees_taker))
+        return hashlib.sha256(data.encode('utf-8')).hexdigest()
+
+
+    def _save_checkpoint(self, stack, d_links):
+        '''
+        Saves the state of an interrupted depth-first traversal into the checkpoint file
+        Creates the directory of the checkpoint file if needed
+        Returns True if the state has been saved, False otherwise
+        (a failed save doesn't prevent the computation from returning the results of an interrupted computation)
+        Parameters:
+            stack   = stack of tasks of the traversal
+            d_links = links accumulated by the traversal (@see PackedLinks)
+        '''
+        state = {
+            'key': self._get_checkpoint_key(),
+            'stack': stack,
+            'd_links': d_links,
+            'in_agg_cmbn_ofs': self._in_agg_cmbn_ofs,
+            'in_agg_cmbn_pairs': self._in_agg_cmbn_pairs,
+            'match_in_agg_to_val': self._match_in_agg_to_val,
+            'val_to_match_out_agg': self._val_to_match_out_agg
+        }
+        # Writes a temporary file first, so that a previous checkpoint is never left half-written
+        tmp_path = self._checkpoint + '.tmp'
+        try:
+            ckpt_dir = os.path.dirname(self._checkpoint)
+            if ckpt_dir:
+                os.makedirs(ckpt_dir, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._checkpoint)
+        except OSError:
+            return False
+        return True
+
+
+    def _read_checkpoint(self):
+        '''
+        Reads the state stored in the checkpoint file
+        Returns the state or None if no checkpoint has been saved for this computation
+        (checkpoint file missing or saved for another computation)
+        '''
+        if (self._checkpoint is None) or (not os.path.isfile(self._checkpoint)):
+            return None
+
+        with open(self._checkpoint, 'rb') as f:
+            state = pickle.load(f)
+
+        # Checks that the checkpoint has been saved for the same computation
+        if state['key'] != self._get_checkpoint_key():
+            return None
+        return state
+
+
+    def _load_checkpoint(self):
+        '''
+        Loads the state of an interrupted depth-first traversal from the checkpoint file
+        Restores the tables of matched aggregates used by the traversal
+        Returns a tuple (stack, d_links) or None if no checkpoint is available for this computation
+        '''
+        state = self._read_checkpoint()
+        if state is None:
+            return None
+
+        self._in_agg_cmbn_ofs = state['in_agg_cmbn_ofs']
+        self._in_agg_cmbn_pairs = state['in_agg_cmbn_pairs']
+        self._match_in_agg_to_val = state['match_in_agg_to_val']
+        self._val_to_match_out_agg = state['val_to_match_out_agg']
+        return state['stack'], state['d_links']
+
+
+    def _clear_checkpoint(self):
+        '''
+        Removes the checkpoint file (computation completed)
+        A checkpoint saved for another computation is kept.
+        '''
+        if self._read_checkpoint() is not None:
+            os.remove(self._checkpoint)
+
+
     '''
     PACKING/UNPACKING OF LINKED TXOS
     '''
@@ -503,24 +1509,29 @@ class TxosLinker(object):
 
         # Merges packs sharing common elements
         packs = merge_sets(linked_txos)
-
-        for pack in packs:
-            ins = []
-            val_ins = 0
-
-            for i in self.inputs:
-                if i[0] in pack:
-                    ins.append(i)
-                    val_ins += i[1]
-
+        idx_packs = {txo_id: k for k, pack in enumerate(packs) for txo_id in pack}
+
+        # Dispatches the inputs between packs (single pass over the inputs)
+        packed_ins = [[] for _ in packs]
+        inputs = []
+        for i in self.inputs:
+            k = idx_packs.get(i[0])
+            if k is None:
+                inputs.append(i)
+            else:
+                packed_ins[k].append(i)
+
+        for ins in packed_ins:
             idx += 1
             if len(ins) > 0:
+                val_ins = sum([i[1] for i in ins])
                 lbl = '%s_I%i' % (self.PACK, idx)
                 inp = (lbl, val_ins)
-                self.inputs.append(inp)
+                inputs.append(inp)
                 in_pack = (lbl, val_ins, 'INPUTS', ins, [])
                 self._packs.append(in_pack)
-                [self.inputs.remove(v) for v in ins]
+
+        self.inputs = inputs
 
 
     def _unpack_link_matrix(self, mat_lnk, nb_cmbn):
@@ -544,7 +1555,7 @@ class TxosLinker(object):
                     nb_outs = len(self.outputs)
                     # Inserts columns into the matrix for packed inputs
                     shape = (nb_outs, nb_ins)
-                    vals = np.zeros(shape , dtype=np.int64)
+                    vals = np.zeros(shape, dtype=mat_res.dtype)
                     vals += mat_res[:,idx][:, np.newaxis]
                     mat_res = np.hstack( (mat_res[:,0:idx], vals, mat_res[:,idx+1:]) )
                 # Inserts unpacked inputs into the list of inputs
@@ -558,7 +1569,7 @@ class TxosLinker(object):
                     nb_outs = len(outs)
                     # Inserts rows into the matrix for packed outputs
                     shape = (nb_outs, nb_ins)
-                    vals = np.zeros(shape, dtype=np.int64)
+                    vals = np.zeros(shape, dtype=mat_res.dtype)
                     vals += mat_res[idx,:][np.newaxis,:]
                     mat_res = np.vstack( (mat_res[0:idx,:], vals, mat_res[idx+1:,:]) )
                 # Inserts unpacked outputs into the list of outputs
@@ -567,11 +1578,87 @@ class TxosLinker(object):
         return mat_res
 
 
+    def _unpack_txo_pairs(self, pairs):
+        '''
+        Replaces packs of input txos by their txos in a list of pairs of txos
+        Returns a list of tuples (id_output, id_input) of unpacked txos
+        Parameters:
+            pairs = list of tuples (id_output, id_input) (some inputs are packs of txos)
+        '''
+        packs = {lbl: ins for (lbl, _, lctn, ins, _) in self._packs if lctn == 'INPUTS'}
+        res = []
+        for (o_id, i_id) in pairs:
+            in_ids = [i_id]
+            while in_ids:
+                txo_id = in_ids.pop()
+                if txo_id in packs:
+                    in_ids += [i[0] for i in packs[txo_id]]
+                else:
+                    res.append((o_id, txo_id))
+        return res
+
+
+    def _build_dtrm_matrix(self, pairs):
+        '''
+        Builds the matrix of deterministic links between the (unpacked) outputs and inputs
+        Returns a boolean matrix (rows = outputs, columns = inputs)
+        Parameters:
+            pairs = list of tuples (id_output, id_input) of unpacked txos
+        '''
+        # Indices of txos (a list of indices per id, in case of duplicates)
+        idx_outs = defaultdict(list)
+        for k, o in enumerate(self.outputs):
+            idx_outs[o[0]].append(k)
+        idx_ins = defaultdict(list)
+        for k, i in enumerate(self.inputs):
+            idx_ins[i[0]].append(k)
+        mat_dtrm = np.zeros((len(self.outputs), len(self.inputs)), dtype=bool)
+        for (o_id, i_id) in pairs:
+            mat_dtrm[np.ix_(idx_outs[o_id], idx_ins[i_id])] = True
+        return mat_dtrm
+
+
     '''
     LIMITS
     '''
     def _check_limit_ok(self, mode):
+        if mode == self.MULTISET:
+            # Checks the numbers of multisets of txos (2**nb_txos if all txos have distinct values)
+            _, in_mult = self._get_classes(self._sort_txos(self.inputs))
+            _, out_mult = self._get_classes(self._sort_txos(self.outputs))
+            nb_multisets = max(np.prod([m+1 for m in in_mult]), np.prod([m+1 for m in out_mult]))
+            return True if (nb_multisets <= 2**self.max_txos) else False
         len_in = len(self.inputs)
         len_out = len(self.outputs)
         max_card = max(len_in, len_out)
         return True if (max_card <= self.max_txos) else False
+
+
+'''
+PARALLEL PROCESSING
+'''
+# Linker used by a worker process (@see TxosLinker._run_dfs_parallel)
+_dfs_worker_linker = None
+
+
+def _init_dfs_worker(state, cancel):
+    '''
+    Initializes a worker process with the data structures required by the depth-first traversal
+    Parameters:
+        state  = dictionary of attributes of the TxosLinker
+        cancel = cancellation token set by the parent process (multiprocessing.Event)
+    '''
+    global _dfs_worker_linker
+    _dfs_worker_linker = TxosLinker(cancel=cancel)
+    _dfs_worker_linker.__dict__.update(state)
+
+
+def _run_dfs_job(deadline, root_range):
+    '''
+    Runs the depth-first traversal of a subset of the subtrees of the root task in a worker process
+    Returns the results of TxosLinker._run_dfs() or None if max duration is reached or if the computation is cancelled
+    Parameters:
+        deadline   = deadline of the computation (monotonic clock, shared by the processes of the machine)
+        root_range = tuple (first, last+1) of decompositions of the root task to be processed
+    '''
+    return _dfs_worker_linker._run_dfs(deadline, root_range)
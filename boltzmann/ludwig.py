@@ -11,13 +11,11 @@ import sys
 # Adds boltzmann directory into path
 sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../")
 
-from boltzmann.utils.tx_processor import process_tx
-from boltzmann.utils.bitcoind_rpc_wrapper import BitcoindRPCWrapper
-from boltzmann.utils.bci_wrapper import BlockchainInfoWrapper
-from boltzmann.utils.smartbit_wrapper import SmartbitWrapper
-from boltzmann.utils.blockstream_wrapper import BlockstreamWrapper
+# Note: modules of the linker and of the data providers are imported on first use
+# (startup time matters when ludwig is called many times from shell scripts, @see display_startup_profile)
 
-def display_results(mat_lnk, nb_cmbn, inputs, outputs, fees, intrafees, efficiency):
+
+def display_results(mat_lnk, nb_cmbn, inputs, outputs, fees, intrafees, efficiency, complete=True, nb_cmbn_ci=None, est_block_size=None, mat_dtrm=None):
     '''
     Displays the results for a given transaction
     Parameters:
@@ -28,6 +26,12 @@ def display_results(mat_lnk, nb_cmbn, inputs, outputs, fees, intrafees, efficien
         fees      = fees associated to this transaction
         intrafees = max intrafees paid/received by participants (tuple (max intrafees received, max intrafees paid))
         efficiency= wallet efficiency for this transaction (expressed as a percentage)
+        complete  = flag indicating if the computation has been completed (False if results are partial)
+        nb_cmbn_ci= confidence interval (95%) of the number of combinations if results have been estimated (None otherwise)
+        est_block_size = max number of inputs (or outputs) of the blocks of the sampled combinations
+                    if estimates are restricted to these combinations (None otherwise)
+        mat_dtrm  = matrix of deterministic links confirmed by the precheck (None if the precheck hasn't been applied)
+                    Only these links are displayed for partial results.
     '''
     print('\nInputs = ' + str(inputs))
     print('\nOutputs = ' + str(outputs))
@@ -37,9 +41,24 @@ def display_results(mat_lnk, nb_cmbn, inputs, outputs, fees, intrafees, efficien
         print('\nHypothesis: Max intrafees received by a participant = %i satoshis' % intrafees[0])
         print('Hypothesis: Max intrafees paid by a participant = %i satoshis' % intrafees[1])
 
-    print('\nNb combinations = %i' % nb_cmbn)
+    # Partial results provide lower bounds
+    cmp_sign = '=' if complete else '>='
+    if nb_cmbn_ci is not None:
+        # Estimated results
+        cmp_sign = '~'
+        print('\nEstimated results (tx with too many inputs and/or outputs for an exact computation).')
+        if est_block_size is not None:
+            print('Estimates are restricted to the combinations made of blocks of at most %i inputs and %i outputs (the last block excepted).'
+                  % (est_block_size, est_block_size))
+            print('Combinations with larger blocks are not counted.')
+    elif not complete and nb_cmbn > 0:
+        print('\nComputation interrupted (max duration reached). Displaying partial results.')
+
+    print('\nNb combinations %s %i' % (cmp_sign, nb_cmbn))
     if nb_cmbn > 0:
-        print('Tx entropy = %f bits' % math.log2(nb_cmbn))
+        print('Tx entropy %s %f bits' % (cmp_sign, math.log2(nb_cmbn)))
+    if (nb_cmbn_ci is not None) and (nb_cmbn_ci[1] > 0):
+        print('Tx entropy (95%% confidence interval) = [%f, %f] bits' % (math.log2(max(1, nb_cmbn_ci[0])), math.log2(nb_cmbn_ci[1])))
 
     if efficiency is not None and efficiency > 0:
         print('Wallet efficiency = %f%% (%f bits)' % (efficiency*100, math.log2(efficiency)))
@@ -51,7 +70,16 @@ def display_results(mat_lnk, nb_cmbn, inputs, outputs, fees, intrafees, efficien
         if nb_cmbn == 0:
             print('\nSkipped processing of this transaction (too many inputs and/or outputs)')
     else:
-        if nb_cmbn != 0:
+        # Partial results store the numbers of combinations found before the interruption
+        # (a link found in all these combinations isn't a deterministic link)
+        partial = (not complete) and (nb_cmbn_ci is None)
+        if partial:
+            print('\nLinkability Matrix (partial #combinations with link) :')
+            print(mat_lnk)
+        elif (nb_cmbn_ci is not None) and (nb_cmbn != 0):
+            print('\nLinkability Matrix (estimated probabilities) :')
+            print(mat_lnk / nb_cmbn)
+        elif nb_cmbn != 0:
             print('\nLinkability Matrix (probabilities) :')
             print(mat_lnk / nb_cmbn)
         else:
@@ -59,24 +87,38 @@ def display_results(mat_lnk, nb_cmbn, inputs, outputs, fees, intrafees, efficien
             print(mat_lnk)
 
         dlCount = 0
-        print('\nDeterministic links :')
+        print('\nDeterministic links%s :' % (' (confirmed by PRECHECK)' if partial else ''))
         for i in range(0, len(outputs)):
             for j in range(0, len(inputs)):
-                if (mat_lnk[i,j] == nb_cmbn) and mat_lnk[i,j] != 0 :
+                if partial:
+                    is_dtrm = (mat_dtrm is not None) and mat_dtrm[i,j]
+                else:
+                    is_dtrm = (mat_lnk[i,j] == nb_cmbn) and mat_lnk[i,j] != 0
+                if is_dtrm:
                     print('%s & %s are deterministically linked' % (inputs[j], outputs[i]))
                     dlCount += 1
 
+        if not partial:
 # deterministic link ratio:
-        nbLinks = len(outputs) * len(inputs)
-        ratioDL = dlCount / nbLinks
-#        nRatioDL = 1.0 - ratioDL
-        print('\nDeterministic link ratio = %f%%' % (ratioDL * 100))
+            nbLinks = len(outputs) * len(inputs)
+            ratioDL = dlCount / nbLinks
+#            nRatioDL = 1.0 - ratioDL
+            print('\nDeterministic link ratio = %f%%' % (ratioDL * 100))
 
 
 
 
+def display_duration(res):
+    '''
+    Displays the duration of the processing of a transaction
+    Parameters:
+        res = results of the processing (@see boltzmann.utils.tx_result.TxResult)
+    '''
+    print('Duration = %s' % str(res.duration))
+
 
-def main(txids, rpc, testnet, smartbit, blockstream, options=['PRECHECK', 'LINKABILITY', 'MERGE_INPUTS'], max_duration=600, max_txos=12, max_cj_intrafees_ratio=0):
+def main(txids, rpc, testnet, smartbit, blockstream, options=['PRECHECK', 'LINKABILITY', 'MERGE_INPUTS'], max_duration=600, max_txos=12, max_cj_intrafees_ratio=0, workers=1, checkpoint_dir=None,
+         slow_log=None, slow_threshold=10, nb_samples=None, max_block_size=None):
     '''
     Main function
     Parameters:
@@ -90,23 +132,38 @@ def main(txids, rpc, testnet, smartbit, blockstream, options=['PRECHECK', 'LINKA
         max_txos                = max number of txos. Txs with more than max_txos inputs or outputs are not processed.
         max_cj_intrafees_ratio  = max intrafees paid by the taker of a coinjoined transaction.
                                   Expressed as a percentage of the coinjoined amount.
+        workers                 = number of processes used for the computation of the linkability matrix
+        checkpoint_dir          = directory storing the states of interrupted computations (one file per txid).
+                                  Computations are resumed from these states during later runs.
+        slow_log                = path of a file storing the txs processed in more than slow_threshold seconds (@see replay)
+        slow_threshold          = min duration (in seconds) of the txs stored in the slow log
+        nb_samples              = number of samples drawn by the estimator (ESTIMATE option, default of the estimator if None)
+        max_block_size          = max number of inputs (or outputs) in a block sampled by the estimator
+                                  (ESTIMATE option, default of the estimator if None)
     '''
     blockchain_provider = None
     provider_descriptor = ''
     if rpc:
+        from boltzmann.utils.bitcoind_rpc_wrapper import BitcoindRPCWrapper
         blockchain_provider = BitcoindRPCWrapper()
         provider_descriptor = 'local RPC interface'
     else:
         if smartbit == True:
+            from boltzmann.utils.smartbit_wrapper import SmartbitWrapper
             blockchain_provider = SmartbitWrapper()
             provider_descriptor = 'remote Smartbit API'
         elif blockstream == True:
+            from boltzmann.utils.blockstream_wrapper import BlockstreamWrapper
             blockchain_provider = BlockstreamWrapper()
             provider_descriptor = 'remote Blockstream API'
         else:
+            from boltzmann.utils.bci_wrapper import BlockchainInfoWrapper
             blockchain_provider = BlockchainInfoWrapper()
             provider_descriptor = 'remote blockchain.info API'
 
+    if len(txids) > 0:
+        from boltzmann.utils.tx_processor import process_tx
+
     print("DEBUG: Using %s" % provider_descriptor)
 
     for txid in txids:
@@ -120,18 +177,104 @@ def main(txids, rpc, testnet, smartbit, blockstream, options=['PRECHECK', 'LINKA
             continue
 
         # Computes the entropy of the tx and the linkability of txos
-        (mat_lnk, nb_cmbn, inputs, outputs, fees, intrafees, efficiency) = process_tx(tx, options, max_duration, max_txos, max_cj_intrafees_ratio)
+        checkpoint = os.path.join(checkpoint_dir, '%s.ckpt' % txid) if checkpoint_dir else None
+        res = process_tx(tx, options, max_duration, max_txos, max_cj_intrafees_ratio, workers, checkpoint, hook=display_duration,
+                         instrument=(slow_log is not None), slow_log=slow_log, slow_threshold=slow_threshold,
+                         nb_samples=nb_samples, max_block_size=max_block_size)
 
         # Displays the results
-        display_results(mat_lnk, nb_cmbn, inputs, outputs, fees, intrafees, efficiency)
+        display_results(res.mat_lnk, res.nb_cmbn, res.txo_ins, res.txo_outs, res.fees, res.intrafees, res.efficiency, res.complete, res.nb_cmbn_ci,
+                        res.est_block_size, res.mat_dtrm)
+
+
+def replay(slow_log, profile=False, workers=1):
+    '''
+    Replays the processing of the txs stored in a slow log (no data provider is used)
+    Parameters:
+        slow_log = path of the slow log (@see boltzmann.utils.tx_processor.append_slow_log)
+        profile  = runs the processing under cProfile and displays the functions with the highest cumulative time
+        workers  = number of processes used for the computation of the linkability matrix
+    '''
+    from boltzmann.utils.tx_processor import read_slow_log, process_txos, compute_wallet_efficiency
+    from time import perf_counter
+
+    for record in read_slow_log(slow_log):
+        print('\n\n--- %s (replay) -------------------------------------' % record['txid'])
+        print('Recorded: engine = %s, duration = %s, options = %s' % (record['engine'], record['duration'], ','.join(record['options'])))
 
+        args = (record['inputs'], record['outputs'], record['fees'], record['linked_txos'], record['intrafees'],
+                record['options'], record['max_duration'], record['max_txos'], workers, None, True)
+        start = perf_counter()
+        if profile:
+            import cProfile
+            import pstats
+            profiler = cProfile.Profile()
+            res = profiler.runcall(process_txos, *args)
+            duration = perf_counter() - start
+            pstats.Stats(profiler, stream=sys.stdout).sort_stats('cumulative').print_stats(25)
+        else:
+            res = process_txos(*args)
+            duration = perf_counter() - start
+
+        print('Duration = %s (engine = %s)' % (str(duration), res.engine))
+        if res.stats is not None:
+            for phase, phase_stats in res.stats.items():
+                print('    %s: %s' % (phase, ', '.join(['%s=%s' % (k, v) for k, v in sorted(phase_stats.items())])))
+
+        efficiency = compute_wallet_efficiency(len(record['inputs']), len(record['outputs']), res.nb_cmbn)
+        display_results(res.mat_lnk, res.nb_cmbn, res.txo_ins, res.txo_outs, res.fees, res.intrafees, efficiency, res.complete, res.nb_cmbn_ci,
+                        res.est_block_size, res.mat_dtrm)
+
+
+def display_startup_profile(argv, nb_rows=20):
+    '''
+    Runs ludwig in a child process with python's import profiler (-X importtime)
+    and displays the import time of modules grouped by top-level package (on stderr)
+    Returns the exit code of the child process
+    Parameters:
+        argv    = arguments passed to the child process
+        nb_rows = max number of packages displayed
+    '''
+    import subprocess
+    from time import perf_counter
+    from collections import defaultdict
+
+    start = perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', os.path.realpath(__file__)] + argv, stderr=subprocess.PIPE, universal_newlines=True)
+    duration = perf_counter() - start
+
+    # Lines are formatted as "import time: self [us] | cumulative | imported package"
+    pkg_self_time = defaultdict(int)
+    pkg_nb_modules = defaultdict(int)
+    total_time = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:'):
+            sys.stderr.write(line + '\n')
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_time = int(fields[0])
+        pkg = fields[2].strip().split('.')[0]
+        pkg_self_time[pkg] += self_time
+        pkg_nb_modules[pkg] += 1
+        total_time += self_time
+
+    sys.stderr.write('\n--- Startup profile -------------------------------------\n')
+    sys.stderr.write('%-24s %10s %8s %8s\n' % ('Package', 'Time (ms)', '%', 'Modules'))
+    for pkg, self_time in sorted(pkg_self_time.items(), key=lambda x: x[1], reverse=True)[:nb_rows]:
+        sys.stderr.write('%-24s %10.1f %8.1f %8i\n' % (pkg, self_time / 1000, 100 * self_time / max(1, total_time), pkg_nb_modules[pkg]))
+    sys.stderr.write('\nTotal import time = %.1f ms' % (total_time / 1000))
+    sys.stderr.write('\nTotal run time = %.1f ms\n' % (duration * 1000))
+    sys.stderr.flush()
+    return proc.returncode
 
 
 def usage():
     '''
     Usage message for this module
     '''
-    sys.stdout.write('python ludwig.py [--rpc] [--testnet] [--smartbit] [--blockstream] [--duration=600] [--maxnbtxos=12] [--cjmaxfeeratio=0] [--options=PRECHECK,LINKABILITY,MERGE_FEES,MERGE_INPUTS,MERGE_OUTPUTS] [--txids=8e56317360a548e8ef28ec475878ef70d1371bee3526c017ac22ad61ae5740b8,812bee538bd24d03af7876a77c989b2c236c063a5803c720769fc55222d36b47,...]');
+    sys.stdout.write('python ludwig.py [--rpc] [--testnet] [--smartbit] [--blockstream] [--duration=600] [--maxnbtxos=12] [--cjmaxfeeratio=0] [--workers=1] [--checkpointdir=/path/to/dir] [--startup-profile] [--slowlog=/path/to/slowlog.jsonl] [--slowthreshold=10] [--samples=1000] [--blocksize=2] [--replay=/path/to/slowlog.jsonl [--profile]] [--options=PRECHECK,LINKABILITY,MERGE_FEES,MERGE_INPUTS,MERGE_OUTPUTS,MEMOIZE,ANYTIME,ESTIMATE,DECOMPOSE,MULTISET] [--txids=8e56317360a548e8ef28ec475878ef70d1371bee3526c017ac22ad61ae5740b8,812bee538bd24d03af7876a77c989b2c236c063a5803c720769fc55222d36b47,...]');
     sys.stdout.write('\n\n[-t OR --txids] = List of txids to be processed.')
     sys.stdout.write('\n\n[-p OR --rpc] = Use bitcoind\'s RPC interface as source of blockchain data')
     sys.stdout.write('\n\n[-T OR --testnet] = Use testnet interface as source of blockchain data')
@@ -140,6 +283,15 @@ def usage():
     sys.stdout.write('\n\n[-d OR --duration] = Maximum number of seconds allocated to the processing of a single transaction. Default value is 600')
     sys.stdout.write('\n\n[-x OR --maxnbtxos] = Maximum number of inputs or ouputs. Transactions with more than maxnbtxos inputs or outputs are not processed. Default value is 12.')
     sys.stdout.write('\n\n[-r OR --cjmaxfeeratio] = Max intrafees paid by the taker of a coinjoined transaction. Expressed as a percentage of the coinjoined amount. Default value is 0.')
+    sys.stdout.write('\n\n[-w OR --workers] = Number of processes used for the computation of the linkability matrix. Default value is 1.')
+    sys.stdout.write('\n\n[--startup-profile] = Displays the import time of modules (grouped by package) on stderr.')
+    sys.stdout.write('\n\n[--slowlog] = File storing the txs processed in more than slowthreshold seconds (json lines). These txs can be replayed with --replay.')
+    sys.stdout.write('\n\n[--slowthreshold] = Min duration (in seconds) of the txs stored in the slow log. Default value is 10.')
+    sys.stdout.write('\n\n[--samples] = Number of combinations sampled by the estimator (ESTIMATE option). Default value is 1000.')
+    sys.stdout.write('\n\n[--blocksize] = Max number of inputs (or outputs) in a block of a combination sampled by the estimator (ESTIMATE option). Estimates are restricted to the combinations made of such blocks. Default value is 2.')
+    sys.stdout.write('\n\n[--replay] = Replays the txs stored in a slow log (no data provider is used).')
+    sys.stdout.write('\n\n[--profile] = Replays the txs under cProfile (used with --replay).')
+    sys.stdout.write('\n\n[-c OR --checkpointdir] = Directory storing the state of computations interrupted after max duration. Interrupted computations are resumed during later runs. Can\'t be used with several workers.')
 
     sys.stdout.write('\n\n[-o OR --options] = Options to be applied during processing. Default value is PRECHECK, LINKABILITY, MERGE_INPUTS')
     sys.stdout.write('\n    Available options are :')
@@ -148,6 +300,11 @@ def usage():
     sys.stdout.write('\n    MERGE_INPUTS = Merges inputs "controlled" by a same address. Speeds up computations.')
     sys.stdout.write('\n    MERGE_OUTPUTS = Merges outputs "controlled" by a same address. Speeds up computations but this option is not recommended.')
     sys.stdout.write('\n    MERGE_FEES = Processes fees as an additional output paid by a single participant. May speed up computations.')
+    sys.stdout.write('\n    ANYTIME = Displays partial results (lower bound of the entropy) if max duration is reached.')
+    sys.stdout.write('\n    MEMOIZE = Computes the linkability matrix with the memoized engine. Same results, faster for txs with many equivalent subproblems.')
+    sys.stdout.write('\n    DECOMPOSE = Splits the transaction into independent components processed separately. Txs with more than maxnbtxos inputs or outputs are processed if their components are small enough.')
+    sys.stdout.write('\n    MULTISET = Computes the linkability matrix with the multiset engine (txos with same value are grouped). Same results, much faster for txs with many equal values.')
+    sys.stdout.write('\n    ESTIMATE = Estimates the entropy and the linkability matrix by sampling for txs with more than maxnbtxos inputs or outputs.')
     sys.stdout.flush()
 
 
@@ -157,11 +314,22 @@ if __name__ == '__main__':
     max_txos = 12
     max_duration = 600
     max_cj_intrafees_ratio = 0 #0.005
+    workers = 1
+    checkpoint_dir = None
+    slow_log = None
+    slow_threshold = 10
+    nb_samples = None
+    max_block_size = None
+    replay_log = None
+    profile = False
     options = ['PRECHECK', 'LINKABILITY', 'MERGE_INPUTS']
     argv = sys.argv[1:]
+    # Profiles the startup of a child process processing the same arguments
+    if '--startup-profile' in argv:
+        sys.exit(display_startup_profile([arg for arg in argv if arg != '--startup-profile']))
     # Processes arguments
     try:
-        opts, args = getopt.getopt(argv, 'hpt:p:T:s:b:d:o:r:x:', ['help', 'rpc', 'testnet', 'smartbit', 'blockstream', 'txids=', 'duration=', 'options=', 'cjmaxfeeratio=', 'maxnbtxos='])
+        opts, args = getopt.getopt(argv, 'hpt:p:T:s:b:d:o:r:x:w:c:', ['help', 'rpc', 'testnet', 'smartbit', 'blockstream', 'txids=', 'duration=', 'options=', 'cjmaxfeeratio=', 'maxnbtxos=', 'workers=', 'checkpointdir=', 'slowlog=', 'slowthreshold=', 'samples=', 'blocksize=', 'replay=', 'profile'])
     except getopt.GetoptError:
         usage()
         sys.exit(2)
@@ -187,9 +355,34 @@ if __name__ == '__main__':
             max_txos = int(arg)
         elif opt in ('-r', '--cjmaxfeeratio'):
             max_cj_intrafees_ratio = float(arg)
+        elif opt in ('-w', '--workers'):
+            workers = int(arg)
+        elif opt in ('-c', '--checkpointdir'):
+            checkpoint_dir = arg
         elif opt in ('-t', '--txids'):
             txids = [t.strip() for t in arg.split(',')]
         elif opt in ('-o', '--options'):
             options = [t.strip() for t in arg.split(',')]
+        elif opt == '--slowlog':
+            slow_log = arg
+        elif opt == '--slowthreshold':
+            slow_threshold = float(arg)
+        elif opt == '--samples':
+            nb_samples = int(arg)
+        elif opt == '--blocksize':
+            max_block_size = int(arg)
+        elif opt == '--replay':
+            replay_log = arg
+        elif opt == '--profile':
+            profile = True
+    # Checkpoints aren't supported by the parallel computation
+    if (workers > 1) and (checkpoint_dir is not None):
+        sys.stdout.write('Options --workers (greater than 1) and --checkpointdir can\'t be used together.\n')
+        usage()
+        sys.exit(2)
+    # Replays slow txs
+    if replay_log is not None:
+        replay(replay_log, profile, workers)
+        sys.exit()
     # Processes computations
-    main(txids=txids, rpc=rpc, testnet=testnet, smartbit=smartbit, blockstream=blockstream, options=options, max_duration=max_duration, max_txos=max_txos, max_cj_intrafees_ratio=max_cj_intrafees_ratio)
+    main(txids=txids, rpc=rpc, testnet=testnet, smartbit=smartbit, blockstream=blockstream, options=options, max_duration=max_duration, max_txos=max_txos, max_cj_intrafees_ratio=max_cj_intrafees_ratio, workers=workers, checkpoint_dir=checkpoint_dir, slow_log=slow_log, slow_threshold=slow_threshold, nb_samples=nb_samples, max_block_size=max_block_size)
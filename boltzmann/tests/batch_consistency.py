@@ -0,0 +1,89 @@
+"""Verifies that the processing of batches of transactions is consistent with the processing of single transactions."""
+import os
+import tempfile
+import unittest
+import numpy as np
+try:
+    from boltzmann.utils.tx_processor import process_tx, process_many, process_txos, read_slow_log
+    from boltzmann.utils.transaction import Transaction
+except ImportError:
+    import sys
+    # Adds boltzmann directory into path
+    sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../../")
+    from boltzmann.utils.tx_processor import process_tx, process_many, process_txos, read_slow_log
+    from boltzmann.utils.transaction import Transaction
+
+
+class BatchTest(unittest.TestCase):
+    """Compare the results of a batch of transactions with the results of process_tx."""
+
+    OPTIONS = ['PRECHECK', 'LINKABILITY']
+
+    # a list of transactions (inputs, outputs)
+    TEST_TXS = [
+        ([('a', 10), ('b', 10)], [('A', 8), ('B', 2), ('C', 3), ('D', 7)]),
+        ([('a', 10), ('b', 10)], [('A', 8), ('B', 2), ('C', 2), ('D', 8)]),
+        ([('a', 10), ('b', 10), ('c', 2)], [('A', 8), ('B', 2), ('C', 2), ('D', 8), ('E', 2)]),
+        ([('a', 5), ('b', 5), ('c', 5)], [('A', 5), ('B', 3), ('C', 2)]),
+        ([('a', 5), ('b', 5), ('c', 10)], [('A', 5), ('B', 5), ('C', 10)]),
+        ([('a', 5), ('b', 5), ('c', 5), ('d', 5), ('e', 5)], [('A', 5), ('B', 5), ('C', 5), ('D', 5), ('E', 5)]),
+        ([('a', 7), ('b', 5), ('c', 9), ('d', 3)], [('A', 4), ('B', 8), ('C', 6), ('D', 5)]),
+        ([('a', 12), ('b', 10), ('c', 10), ('d', 6)], [('A', 10), ('B', 10), ('C', 10), ('D', 5), ('E', 2)]),
+        ([('a', 100), ('b', 37), ('c', 61), ('d', 29)], [('A', 81), ('B', 56), ('C', 20), ('D', 41), ('E', 29)]),
+    ]
+
+    def _build_tx(self, txid, inputs, outputs):
+        return Transaction({
+            'hash': txid,
+            'time': 0,
+            'inputs': [{'prev_out': {'n': 0, 'value': v, 'addr': a, 'tx_index': 0}} for (a, v) in inputs],
+            'out': [{'n': n, 'value': v, 'addr': a, 'tx_index': 0} for n, (a, v) in enumerate(outputs)]
+        })
+
+    def test_process_many(self):
+        """Verify that results are yielded in the order of txs and that txs exceeding the timeout are killed."""
+        # A tx requiring a long enumeration (equal values but not a perfect coinjoin)
+        slow_tx = self._build_tx('slow', [('i%i' % k, 5) for k in range(10)], [('o%i' % k, 5) for k in range(9)] + [('o9', 4)])
+        txs = [slow_tx] + [self._build_tx('tx%i' % k, inputs, outputs) for k, (inputs, outputs) in enumerate(self.TEST_TXS)]
+        results = list(process_many(iter(txs), workers=2, per_tx_timeout=1, options=self.OPTIONS, ordered=True))
+        self.assertEqual(list(range(len(txs))), [idx for (idx, _, _, _) in results])
+        self.assertEqual((None, 'timeout'), results[0][2:])
+        for (idx, tx, res, err) in results[1:]:
+            self.assertIsNone(err)
+            exp_res = process_tx(tx, self.OPTIONS, 600, 12)
+            self.assertEqual(tx.txid, res.txid)
+            self.assertEqual(exp_res.nb_cmbn, res.nb_cmbn, tx.txid)
+            self.assertTrue(np.array_equal(exp_res.mat_lnk, res.mat_lnk), tx.txid)
+            self.assertEqual((exp_res.txo_ins, exp_res.txo_outs, exp_res.engine), (res.txo_ins, res.txo_outs, res.engine), tx.txid)
+
+    def test_unpack_result(self):
+        """Verify that results can still be unpacked as the tuple formerly returned by process_tx."""
+        inputs, outputs = self.TEST_TXS[0]
+        res = process_tx(self._build_tx('tx', inputs, outputs), self.OPTIONS, 600, 12)
+        mat_lnk, nb_cmbn, txo_ins, txo_outs, fees, intrafees, efficiency = res
+        self.assertTrue(np.array_equal(res.mat_lnk, mat_lnk))
+        self.assertEqual((res.nb_cmbn, res.txo_ins, res.txo_outs, res.fees, res.intrafees, res.efficiency),
+                         (nb_cmbn, txo_ins, txo_outs, fees, intrafees, efficiency))
+
+    def test_slow_log(self):
+        """Verify that the txs stored in the slow log are replayed with the same results."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            slow_log = os.path.join(tmp_dir, 'slow.jsonl')
+            options = self.OPTIONS + ['MERGE_INPUTS']
+            txs = [self._build_tx('tx%i' % k, inputs, outputs) for k, (inputs, outputs) in enumerate(self.TEST_TXS)]
+            # Linked inputs (same address)
+            txs.append(self._build_tx('linked', [('a', 7), ('b', 5), ('a', 9), ('d', 3)], [('A', 4), ('B', 8), ('C', 6), ('D', 5)]))
+            results = [process_tx(tx, options, 600, 12, instrument=True, slow_log=slow_log, slow_threshold=0) for tx in txs]
+            records = list(read_slow_log(slow_log))
+            self.assertEqual([tx.txid for tx in txs], [r['txid'] for r in records])
+            for (res, record) in zip(results, records):
+                self.assertEqual(res.engine, record['engine'])
+                self.assertEqual(res.stats, record['stats'])
+                replay_res = process_txos(record['inputs'], record['outputs'], record['fees'], record['linked_txos'], record['intrafees'],
+                                          record['options'], record['max_duration'], record['max_txos'])
+                self.assertEqual(res.nb_cmbn, replay_res.nb_cmbn, res.txid)
+                self.assertTrue(np.array_equal(res.mat_lnk, replay_res.mat_lnk), res.txid)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,353 @@
+"""Verifies that all engines of the TxosLinker return consistent results."""
+import io
+import os
+import tempfile
+import contextlib
+import threading
+import unittest
+import numpy as np
+from unittest import mock
+try:
+    from boltzmann.linker import dfs_frame
+    from boltzmann.linker.txos_linker import TxosLinker
+    from boltzmann.linker.txos_estimator import TxosEstimator
+    from boltzmann.linker.metrics import MetricsRegistry
+    from boltzmann.utils import tx_processor
+    from boltzmann.utils.tx_processor import check_perfect_coinjoin, compute_link_matrix_perfect_cj, compute_cmbns_perfect_cj
+    from boltzmann.ludwig import display_results
+except ImportError:
+    import sys
+    import os
+    # Adds boltzmann directory into path
+    sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../../")
+    from boltzmann.linker import dfs_frame
+    from boltzmann.linker.txos_linker import TxosLinker
+    from boltzmann.linker.txos_estimator import TxosEstimator
+    from boltzmann.linker.metrics import MetricsRegistry
+    from boltzmann.utils import tx_processor
+    from boltzmann.utils.tx_processor import check_perfect_coinjoin, compute_link_matrix_perfect_cj, compute_cmbns_perfect_cj
+    from boltzmann.ludwig import display_results
+
+
+class EnginesTest(unittest.TestCase):
+    """Compare the results of the engines of the TxosLinker for given transactions."""
+
+    MAX_DURATION = 600
+
+    # a list of transactions (inputs, outputs, linked txos, intrafees)
+    TEST_TXS = [
+        ([('a', 10), ('b', 10)], [('A', 8), ('B', 2), ('C', 3), ('D', 7)], [], (0, 0)),
+        ([('a', 10), ('b', 10)], [('A', 8), ('B', 2), ('C', 2), ('D', 8)], [], (0, 0)),
+        ([('a', 10), ('b', 10), ('c', 2)], [('A', 8), ('B', 2), ('C', 2), ('D', 8), ('E', 2)], [], (0, 0)),
+        ([('a', 5), ('b', 5), ('c', 5)], [('A', 5), ('B', 3), ('C', 2)], [], (0, 0)),
+        ([('a', 5), ('b', 5), ('c', 10)], [('A', 5), ('B', 5), ('C', 10)], [], (0, 0)),
+        ([('a', 5), ('b', 5), ('c', 5), ('d', 5), ('e', 5)], [('A', 5), ('B', 5), ('C', 5), ('D', 5), ('E', 5)], [], (0, 0)),
+        ([('a', 7), ('b', 5), ('c', 9), ('d', 3)], [('A', 4), ('B', 8), ('C', 6), ('D', 5)], [{'a', 'b'}], (0, 0)),
+        ([('a', 12), ('b', 10), ('c', 10), ('d', 6)], [('A', 10), ('B', 10), ('C', 10), ('D', 5), ('E', 2)], [], (1, 2)),
+        ([('a', 100), ('b', 37), ('c', 61), ('d', 29)], [('A', 81), ('B', 56), ('C', 20), ('D', 41), ('E', 29)], [], (0, 0)),
+    ]
+
+    OPTIONS = ['PRECHECK', 'LINKABILITY']
+
+    def _process(self, inputs, outputs, linked_txos, intrafees, options, **kwargs):
+        fees = sum([v[1] for v in inputs]) - sum([v[1] for v in outputs])
+        linker = TxosLinker(inputs, outputs, fees, self.MAX_DURATION, **kwargs)
+        return linker.process([set(s) for s in linked_txos], options, intrafees)
+
+    def _assert_engine(self, options, **kwargs):
+        for test_idx, (inputs, outputs, linked_txos, intrafees) in enumerate(self.TEST_TXS):
+            exp_mat, exp_nb, exp_ins, exp_outs = self._process(inputs, outputs, linked_txos, intrafees, self.OPTIONS)
+            mat, nb, ins, outs = self._process(inputs, outputs, linked_txos, intrafees, self.OPTIONS + options, **kwargs)
+            msg = "Test {0}".format(test_idx+1)
+            self.assertEqual(exp_nb, nb, msg)
+            self.assertEqual(exp_ins, ins, msg)
+            self.assertEqual(exp_outs, outs, msg)
+            self.assertTrue(np.array_equal(exp_mat, mat), msg)
+
+    def _assert_patched(self, patches):
+        """Verify that the depth-first engine returns the same results when patched."""
+        exp_results = [self._process(inputs, outputs, linked_txos, intrafees, self.OPTIONS)
+                       for (inputs, outputs, linked_txos, intrafees) in self.TEST_TXS]
+        with contextlib.ExitStack() as stack:
+            mocks = [stack.enter_context(p) for p in patches]
+            for test_idx, (inputs, outputs, linked_txos, intrafees) in enumerate(self.TEST_TXS):
+                exp_mat, exp_nb, exp_ins, exp_outs = exp_results[test_idx]
+                mat, nb, ins, outs = self._process(inputs, outputs, linked_txos, intrafees, self.OPTIONS)
+                msg = "Test {0}".format(test_idx+1)
+                self.assertEqual(exp_nb, nb, msg)
+                self.assertEqual((exp_ins, exp_outs), (ins, outs), msg)
+                self.assertTrue(np.array_equal(exp_mat, mat), msg)
+        return mocks
+
+    def test_memoize(self):
+        """Verify that the memoized engine returns the results of the depth-first engine."""
+        self._assert_engine([TxosLinker.MEMOIZE])
+
+    def test_multiset(self):
+        """Verify that the multiset engine returns the results of the depth-first engine."""
+        self._assert_engine([TxosLinker.MULTISET])
+
+    def test_decompose(self):
+        """Verify that the decomposition into independent components returns the results of the depth-first engine."""
+        self._assert_engine([TxosLinker.DECOMPOSE])
+        # Txs with more than max_txos inputs and outputs are processed if their components are small enough
+        inputs, outputs, linked_txos, intrafees = self.TEST_TXS[-1]
+        options = [TxosLinker.LINKABILITY]
+        exp_mat, exp_nb, _, _ = self._process(inputs, outputs, linked_txos, intrafees, options)
+        mat, nb, _, _ = self._process(inputs, outputs, linked_txos, intrafees, options + [TxosLinker.DECOMPOSE], max_txos=3)
+        self.assertEqual(exp_nb, nb)
+        self.assertTrue(np.array_equal(exp_mat, mat))
+
+    def test_perfect_coinjoin(self):
+        """Verify that the closed-form results of perfect coinjoins are the results of the depth-first engine."""
+        # (nb inputs, nb outputs, input value, output value)
+        for (nb_i, nb_o, val_i, val_o) in [(5, 5, 101, 100), (3, 6, 200, 100), (6, 2, 100, 299), (4, 4, 100, 100)]:
+            inputs = [('i%i' % k, val_i) for k in range(nb_i)]
+            outputs = [('o%i' % k, val_o) for k in range(nb_o)]
+            msg = "Test {0}x{1}".format(nb_i, nb_o)
+            self.assertTrue(check_perfect_coinjoin(inputs, outputs), msg)
+            exp_mat, exp_nb, _, _ = self._process(inputs, outputs, [], (0, 0), self.OPTIONS)
+            mat, nb = compute_link_matrix_perfect_cj(nb_i, nb_o)
+            self.assertEqual(exp_nb, nb, msg)
+            self.assertTrue(np.array_equal(exp_mat, mat), msg)
+        # Fees higher than an output value
+        self.assertFalse(check_perfect_coinjoin([('i0', 150), ('i1', 150)], [('o0', 100), ('o1', 100)]))
+
+    def test_cmbns_perfect_coinjoin(self):
+        """Verify the number of combinations of perfect coinjoins not stored in the precomputed table."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            cache_file = os.path.join(tmp_dir, 'cache.json')
+            # (nb inputs, nb outputs, nb combinations computed with exponential Bell polynomials)
+            exp_results = [(21, 21, 971364434755984806600133623737),
+                           (42, 21, 407459537701194883846601451499833998124500255666753)]
+            with mock.patch.object(tx_processor, 'PRFCT_CJ_CACHE_FILE', cache_file), mock.patch.object(tx_processor, '_prfct_cj_cache', None):
+                for (nb_i, nb_o, exp_nb) in exp_results:
+                    self.assertEqual(exp_nb, compute_cmbns_perfect_cj(nb_i, nb_o))
+                self.assertTrue(os.path.isfile(cache_file))
+            # Values are loaded from the cache
+            with mock.patch.object(tx_processor, 'PRFCT_CJ_CACHE_FILE', cache_file), mock.patch.object(tx_processor, '_prfct_cj_cache', None):
+                for (nb_i, nb_o, exp_nb) in exp_results:
+                    self.assertEqual(exp_nb, compute_cmbns_perfect_cj(nb_i, nb_o))
+                self.assertIn(1, tx_processor._prfct_cj_cache)
+
+    def test_instrument(self):
+        """Verify that the instrumentation doesn't change the results and records the statistics of each phase."""
+        self._assert_engine([], instrument=True)
+        inputs, outputs, linked_txos, intrafees = self.TEST_TXS[5]
+        fees = sum([v[1] for v in inputs]) - sum([v[1] for v in outputs])
+        linker = TxosLinker(inputs, outputs, fees, self.MAX_DURATION, instrument=True)
+        linker.process(options=self.OPTIONS)
+        phases = ['prepare_data', 'match_agg_by_val', 'check_dtrm_links', 'compute_in_agg_cmbn', 'compute_link_matrix', 'unpack_link_matrix']
+        self.assertEqual(set(phases), set(linker.stats.keys()))
+        self.assertTrue(linker.stats['compute_link_matrix']['nodes'] > 0)
+        self.assertEqual(len(inputs), linker.stats['compute_link_matrix']['max_stack_depth'])
+        # Aggregation of the statistics of 2 txs
+        registry = MetricsRegistry()
+        registry.record(linker.stats, linker.engine)
+        registry.record(linker.stats, linker.engine)
+        data = registry.to_dict()
+        self.assertEqual({TxosLinker.DFS: 2}, data['txs'])
+        self.assertEqual(2 * linker.stats['compute_link_matrix']['nodes'], data['phases']['compute_link_matrix']['nodes'])
+        self.assertEqual(linker.stats['compute_link_matrix']['max_stack_depth'], data['phases']['compute_link_matrix']['max_stack_depth'])
+        self.assertIn('boltzmann_phase_nodes_total{phase="compute_link_matrix"}', registry.to_prometheus())
+
+    def test_prepare_data(self):
+        """Verify that the data derived from the precheck is the data computed from scratch for the linkability."""
+        txs = self.TEST_TXS + [
+            ([('a', 7), ('a', 7), ('b', 3), ('c', 100)], [('A', 7), ('B', 7), ('C', 3), ('D', 100)], [], (0, 0)),
+            ([('a', 7), ('b', 5), ('c', 9), ('d', 3), ('e', 40)], [('A', 4), ('B', 8), ('C', 6), ('D', 5), ('E', 40)], [{'a', 'b'}], (0, 0)),
+        ]
+        for test_idx, (inputs, outputs, linked_txos, intrafees) in enumerate(txs):
+            with mock.patch.object(TxosLinker, '_derive_packed_txos', lambda linker, txos, *args: linker._prepare_txos(txos)):
+                exp_mat, exp_nb, exp_ins, exp_outs = self._process(inputs, outputs, linked_txos, intrafees, self.OPTIONS)
+            mat, nb, ins, outs = self._process(inputs, outputs, linked_txos, intrafees, self.OPTIONS)
+            msg = "Test {0}".format(test_idx+1)
+            self.assertEqual(exp_nb, nb, msg)
+            self.assertEqual(exp_ins, ins, msg)
+            self.assertEqual(exp_outs, outs, msg)
+            self.assertTrue(np.array_equal(exp_mat, mat), msg)
+        # Data is reused as is if no deterministic link has been found
+        inputs, outputs, _, _ = self.TEST_TXS[0]
+        linker = TxosLinker(inputs, outputs, 0, self.MAX_DURATION, instrument=True)
+        linker.process(options=self.OPTIONS)
+        self.assertEqual(2, linker.stats['prepare_data']['calls'])
+        self.assertEqual(1, linker.stats['match_agg_by_val']['calls'])
+
+    def test_cancel(self):
+        """Verify that a computation is interrupted when the cancellation token is set."""
+        # A tx requiring a long enumeration
+        inputs = [('i%i' % k, 5) for k in range(10)]
+        outputs = [('o%i' % k, 5) for k in range(9)] + [('o9', 4)]
+        for workers in [1, 2]:
+            cancel = threading.Event()
+            progress = []
+            def on_progress(nb_nodes, depth, fraction):
+                progress.append(fraction)
+                if len(progress) == 2:
+                    cancel.set()
+            linker = TxosLinker(inputs, outputs, 1, self.MAX_DURATION, workers=workers, progress=on_progress, cancel=cancel)
+            mat, nb, _, _ = linker.process(options=[TxosLinker.LINKABILITY])
+            msg = "Workers {0}".format(workers)
+            self.assertTrue(linker.cancelled, msg)
+            self.assertFalse(linker.complete, msg)
+            self.assertEqual(0, nb, msg)
+            self.assertTrue(all([0 <= f <= 1 for f in progress]), msg)
+
+    def test_array_frames(self):
+        """Verify that frames stored in numpy arrays return the results of frames stored in dictionaries."""
+        # Frames are built from arrays by the vectorized matching of output combinations
+        _, _, frame_mock = self._assert_patched([mock.patch.object(TxosLinker, 'MIN_VECTORIZED_SIZE', 0),
+                                                 mock.patch.object(dfs_frame, 'MIN_ARRAY_FRAME_SIZE', 1),
+                                                 mock.patch.object(dfs_frame, 'DfsArrayFrame', wraps=dfs_frame.DfsArrayFrame)])
+        self.assertTrue(frame_mock.called)
+
+    def test_vectorized_matching(self):
+        """Verify that the vectorized matching of output combinations returns the results of the scalar matching."""
+        _, frame_mock = self._assert_patched([mock.patch.object(TxosLinker, 'MIN_VECTORIZED_SIZE', 0),
+                                              mock.patch('boltzmann.linker.txos_linker.new_frame', wraps=dfs_frame.new_frame)])
+        self.assertTrue(frame_mock.called)
+
+    def test_workers(self):
+        """Verify that the parallel depth-first engine returns the results of the sequential one."""
+        self._assert_engine([], workers=2)
+
+    def test_anytime(self):
+        """Verify that partial results of an interrupted computation are lower bounds of the expected results."""
+        for test_idx, (inputs, outputs, linked_txos, intrafees) in enumerate(self.TEST_TXS):
+            exp_mat, exp_nb, _, _ = self._process(inputs, outputs, linked_txos, intrafees, self.OPTIONS)
+            fees = sum([v[1] for v in inputs]) - sum([v[1] for v in outputs])
+            linker = TxosLinker(inputs, outputs, fees, 0)
+            mat, nb, _, _ = linker.process([set(s) for s in linked_txos], self.OPTIONS + [TxosLinker.ANYTIME], intrafees)
+            msg = "Test {0}".format(test_idx+1)
+            self.assertFalse(linker.complete, msg)
+            self.assertTrue(0 < nb <= exp_nb, msg)
+            self.assertTrue(np.all(mat <= exp_mat), msg)
+            self.assertTrue(np.all(mat <= nb), msg)
+        # Partial results of the subtrees processed by a pool of processes (perfect coinjoin too long to be processed)
+        inputs = [('i%i' % k, 5) for k in range(10)]
+        outputs = [('o%i' % k, 5) for k in range(10)]
+        exp_mat, exp_nb = compute_link_matrix_perfect_cj(10, 10)
+        linker = TxosLinker(inputs, outputs, 0, 2, workers=2)
+        mat, nb, _, _ = linker.process(options=self.OPTIONS + [TxosLinker.ANYTIME])
+        self.assertFalse(linker.complete)
+        self.assertTrue(1 < nb < exp_nb)
+        self.assertTrue(np.all(mat <= exp_mat))
+        self.assertTrue(np.all(mat <= nb))
+
+    def test_anytime_dtrm_links(self):
+        """Verify that only the deterministic links confirmed by the precheck are reported for partial results."""
+        for test_idx, (inputs, outputs, linked_txos, intrafees) in enumerate(self.TEST_TXS):
+            exp_mat, exp_nb, _, _ = self._process(inputs, outputs, linked_txos, intrafees, self.OPTIONS)
+            fees = sum([v[1] for v in inputs]) - sum([v[1] for v in outputs])
+            linker = TxosLinker(inputs, outputs, fees, 0)
+            mat, nb, ins, outs = linker.process([set(s) for s in linked_txos], self.OPTIONS + [TxosLinker.ANYTIME], intrafees)
+            msg = "Test {0}".format(test_idx+1)
+            self.assertFalse(linker.complete, msg)
+            nb_dtrm = 0
+            if linker.mat_dtrm is not None:
+                self.assertTrue(np.all(exp_mat[linker.mat_dtrm] == exp_nb), msg)
+                nb_dtrm = int(linker.mat_dtrm.sum())
+            output = io.StringIO()
+            with contextlib.redirect_stdout(output):
+                display_results(mat, nb, ins, outs, fees, intrafees, None, linker.complete, mat_dtrm=linker.mat_dtrm)
+            output = output.getvalue()
+            self.assertEqual(nb_dtrm, output.count('deterministically linked'), msg)
+            self.assertNotIn('Deterministic link ratio', output, msg)
+            self.assertNotIn('probabilities', output, msg)
+
+    def test_checkpoint(self):
+        """Verify that a computation interrupted and resumed from a checkpoint returns the expected results."""
+        inputs, outputs, linked_txos, intrafees = self.TEST_TXS[5]
+        exp_mat, exp_nb, _, _ = self._process(inputs, outputs, linked_txos, intrafees, self.OPTIONS)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            checkpoint = os.path.join(tmp_dir, 'test.ckpt')
+            fees = sum([v[1] for v in inputs]) - sum([v[1] for v in outputs])
+            # Interrupts the computation as soon as it starts
+            linker = TxosLinker(inputs, outputs, fees, 0, checkpoint=checkpoint)
+            _, nb, _, _ = linker.process(options=self.OPTIONS)
+            self.assertEqual(0, nb)
+            self.assertTrue(os.path.isfile(checkpoint))
+            # Resumes the computation
+            linker = TxosLinker(inputs, outputs, fees, self.MAX_DURATION, checkpoint=checkpoint)
+            mat, nb, _, _ = linker.process(options=self.OPTIONS)
+            self.assertEqual(exp_nb, nb)
+            self.assertTrue(np.array_equal(exp_mat, mat))
+            self.assertFalse(os.path.isfile(checkpoint))
+            # Keeps a checkpoint saved for another tx
+            TxosLinker(inputs, outputs, fees, 0, checkpoint=checkpoint).process(options=self.OPTIONS)
+            other_ins, other_outs = self.TEST_TXS[0][0], self.TEST_TXS[0][1]
+            other_fees = sum([v[1] for v in other_ins]) - sum([v[1] for v in other_outs])
+            linker = TxosLinker(other_ins, other_outs, other_fees, self.MAX_DURATION, checkpoint=checkpoint)
+            linker.process(options=self.OPTIONS)
+            self.assertTrue(linker.complete)
+            self.assertTrue(os.path.isfile(checkpoint))
+            linker = TxosLinker(inputs, outputs, fees, self.MAX_DURATION, checkpoint=checkpoint)
+            mat, nb, _, _ = linker.process(options=self.OPTIONS)
+            self.assertEqual(exp_nb, nb)
+            self.assertFalse(os.path.isfile(checkpoint))
+            # Creates the missing directory of the checkpoint
+            checkpoint = os.path.join(tmp_dir, 'missing', 'test.ckpt')
+            linker = TxosLinker(inputs, outputs, fees, 0, checkpoint=checkpoint)
+            linker.process(options=self.OPTIONS)
+            self.assertTrue(os.path.isfile(checkpoint))
+            # Returns the results of an interrupted computation if the checkpoint can't be saved
+            checkpoint = os.path.join(checkpoint, 'test.ckpt')
+            linker = TxosLinker(inputs, outputs, fees, 0, checkpoint=checkpoint)
+            mat, nb, _, _ = linker.process(options=self.OPTIONS)
+            self.assertEqual((None, 0, False), (mat, nb, linker.complete))
+            # Checkpoints aren't supported by the parallel computation
+            with self.assertRaises(ValueError):
+                TxosLinker(inputs, outputs, fees, 0, workers=2, checkpoint=checkpoint)
+
+    def test_estimate(self):
+        """Verify that the estimator returns results consistent with the expected results."""
+        for test_idx, (inputs, outputs, linked_txos, intrafees) in enumerate(self.TEST_TXS):
+            # Deterministic links aren't packed by the estimator
+            exp_mat, exp_nb, exp_ins, exp_outs = self._process(inputs, outputs, linked_txos, intrafees, [TxosLinker.LINKABILITY])
+            fees = sum([v[1] for v in inputs]) - sum([v[1] for v in outputs])
+            # Blocks of any size are sampled, so that the estimator targets the number of combinations of the tx
+            estimator = TxosEstimator(inputs, outputs, fees, self.MAX_DURATION, nb_samples=2000, max_block_size=len(outputs), seed=test_idx)
+            mat, nb, ins, outs = estimator.process([set(s) for s in linked_txos], [TxosLinker.LINKABILITY], intrafees)
+            msg = "Test {0}".format(test_idx+1)
+            self.assertTrue(estimator.complete, msg)
+            self.assertEqual(exp_ins, ins, msg)
+            self.assertEqual(exp_outs, outs, msg)
+            self.assertTrue(estimator.nb_cmbn_ci[0] <= exp_nb <= estimator.nb_cmbn_ci[1], msg)
+            prob = (mat / nb).astype(float)
+            self.assertTrue(np.all(np.abs(prob - exp_mat / exp_nb) <= 5 * estimator.mat_lnk_stderr + 1e-9), msg)
+
+    def test_estimate_default(self):
+        """Verify that the estimates of the default estimator (blocks of at most 2 txos) are restricted to the sampled combinations."""
+        for test_idx, (inputs, outputs, linked_txos, intrafees) in enumerate(self.TEST_TXS):
+            exp_mat, exp_nb, exp_ins, exp_outs = self._process(inputs, outputs, linked_txos, intrafees, [TxosLinker.LINKABILITY])
+            fees = sum([v[1] for v in inputs]) - sum([v[1] for v in outputs])
+            estimator = TxosEstimator(inputs, outputs, fees, self.MAX_DURATION, seed=test_idx)
+            mat, nb, ins, outs = estimator.process([set(s) for s in linked_txos], [TxosLinker.LINKABILITY], intrafees)
+            msg = "Test {0}".format(test_idx+1)
+            self.assertTrue(estimator.complete, msg)
+            self.assertEqual(TxosEstimator.MAX_BLOCK_SIZE, estimator.restricted_block_size, msg)
+            self.assertTrue(estimator.nb_cmbn_ci[0] <= nb <= estimator.nb_cmbn_ci[1], msg)
+            # Combinations with larger blocks aren't counted
+            self.assertTrue(0 < nb <= exp_nb, msg)
+
+        # Options of the estimator are passed through process_txos
+        inputs, outputs = self.TEST_TXS[2][0], self.TEST_TXS[2][1]
+        fees = sum([v[1] for v in inputs]) - sum([v[1] for v in outputs])
+        options = ['PRECHECK', 'LINKABILITY', 'ESTIMATE']
+        res = tx_processor.process_txos(inputs, outputs, fees, [], (0, 0), options, self.MAX_DURATION, 4)
+        self.assertEqual(tx_processor.ESTIMATE, res.engine)
+        self.assertTrue(res.complete)
+        self.assertEqual(TxosEstimator.MAX_BLOCK_SIZE, res.est_block_size)
+        self.assertTrue(res.nb_cmbn_ci[0] <= res.nb_cmbn <= res.nb_cmbn_ci[1])
+        # Estimates are displayed as restricted to the sampled combinations
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            display_results(res.mat_lnk, res.nb_cmbn, res.txo_ins, res.txo_outs, fees, (0, 0), None, res.complete, res.nb_cmbn_ci, res.est_block_size)
+        self.assertIn('restricted to the combinations made of blocks of at most 2 inputs and 2 outputs', output.getvalue())
+        res = tx_processor.process_txos(inputs, outputs, fees, [], (0, 0), options, self.MAX_DURATION, 4, nb_samples=10, max_block_size=len(outputs))
+        self.assertIsNone(res.est_block_size)
+        self.assertTrue(res.nb_cmbn_ci[0] <= res.nb_cmbn <= res.nb_cmbn_ci[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
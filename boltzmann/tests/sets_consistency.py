@@ -0,0 +1,71 @@
+"""Verifies the merging of sets of linked txos."""
+import unittest
+try:
+    from boltzmann.utils.disjoint_sets import DisjointSets
+    from boltzmann.utils.lists import merge_sets
+    from boltzmann.utils.tx_processor import get_linked_txos
+except ImportError:
+    import sys
+    import os
+    # Adds boltzmann directory into path
+    sys.path.append(os.path.dirname(os.path.realpath(__file__)) + "/../../")
+    from boltzmann.utils.disjoint_sets import DisjointSets
+    from boltzmann.utils.lists import merge_sets
+    from boltzmann.utils.tx_processor import get_linked_txos
+
+
+class SetsTest(unittest.TestCase):
+    """Compare the sets computed by the union-find structure with the expected sets."""
+
+    def test_disjoint_sets(self):
+        """Verify the unions and finds of the union-find structure."""
+        dsets = DisjointSets(['a', 'b', 'c', 'd', 'e'])
+        self.assertEqual(5, len(dsets))
+        self.assertEqual('a', dsets.find('a'))
+        root = dsets.union('a', 'b')
+        self.assertIn(root, {'a', 'b'})
+        self.assertEqual(dsets.find('a'), dsets.find('b'))
+        self.assertEqual(4, len(dsets))
+        # Union of elements of a same set
+        self.assertEqual(root, dsets.union('b', 'a'))
+        self.assertEqual(4, len(dsets))
+        # Chained unions
+        dsets.union('c', 'd')
+        dsets.union('d', 'b')
+        self.assertEqual(dsets.find('a'), dsets.find('c'))
+        self.assertNotEqual(dsets.find('a'), dsets.find('e'))
+        self.assertEqual(2, len(dsets))
+        # Elements are added on first use
+        dsets.union_all(['f', 'g', 'e'])
+        self.assertEqual(dsets.find('f'), dsets.find('e'))
+        self.assertEqual([{'a', 'b', 'c', 'd'}, {'e', 'f', 'g'}], dsets.groups())
+        self.assertEqual([{'e', 'f', 'g'}, {'a', 'b', 'c', 'd'}], dsets.groups(['g', 'a', 'b', 'c', 'd', 'e', 'f']))
+
+    def test_merge_sets(self):
+        """Verify that sets sharing elements are merged and ordered by their first set."""
+        # Overlapping sets
+        self.assertEqual([{1, 2, 4, 7}, {3}, {5, 6}, {8}], merge_sets([{1, 2}, {3}, {2, 4}, {5, 6}, {4, 7}, {8}]))
+        # Chained sets (merged through a set following them)
+        self.assertEqual([{'a', 'b', 'c', 'd'}, {'e'}], merge_sets([{'a', 'b'}, {'c', 'd'}, {'b', 'c'}, {'e'}]))
+        self.assertEqual([{1, 2, 3, 4}], merge_sets([{1}, {2}, {3}, {4}, {1, 2}, {3, 4}, {2, 3}]))
+        # Disjoint sets
+        self.assertEqual([{3}, {1}, {2}], merge_sets([{3}, {1}, {2}]))
+        self.assertEqual([], merge_sets([]))
+        # Sets passed as parameter aren't modified
+        sets = [{1, 2}, {2, 3}]
+        merge_sets(sets)
+        self.assertEqual([{1, 2}, {2, 3}], sets)
+
+    def test_get_linked_txos(self):
+        """Verify that txos sharing an address are linked and that sets are ordered by their last txo."""
+        txos = [('I0', 5), ('I1', 3), ('I2', 4), ('I3', 1), ('I4', 2), ('I5', 2)]
+        map_id_addr = {'I0': 'y', 'I1': 'x', 'I2': 'z', 'I3': 'x', 'I4': 'y', 'I5': 'w'}
+        self.assertEqual([{'I1', 'I3'}, {'I0', 'I4'}], get_linked_txos(txos, map_id_addr))
+        map_id_addr = {'I0': 'x', 'I1': 'y', 'I2': 'x', 'I3': 'z', 'I4': 'y', 'I5': 'x'}
+        self.assertEqual([{'I1', 'I4'}, {'I0', 'I2', 'I5'}], get_linked_txos(txos, map_id_addr))
+        # No address shared by several txos
+        self.assertEqual([], get_linked_txos(txos[:3], {'I0': 'x', 'I1': 'y', 'I2': 'z'}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""Verifies that the startup of ludwig and of the linker stays within a cold-start budget.
+
+Budgets are relative to baselines measured in the same run (startup of a bare interpreter, import of numpy),
+so that they hold on slower or loaded machines.
+"""
+import os
+import sys
+import subprocess
+import unittest
+from time import perf_counter
+
+
+ROOT_DIR = os.path.realpath(os.path.dirname(os.path.realpath(__file__)) + "/../../")
+LUDWIG = os.path.join(ROOT_DIR, 'boltzmann', 'ludwig.py')
+
+
+class StartupTest(unittest.TestCase):
+    """Measure the duration of new python processes (best of NB_RUNS runs)."""
+
+    NB_RUNS = 5
+
+    # Max durations (ratios of the durations of the baselines)
+    # A run of ludwig which doesn't process any tx is compared to the startup of a bare interpreter
+    BUDGET_USAGE = 5.0
+    # A run processing a small tx is compared to a run only importing numpy
+    BUDGET_SMALL_TX = 2.0
+
+    BASELINE_USAGE = ['-c', 'pass']
+    BASELINE_SMALL_TX = ['-c', 'import numpy']
+
+    # Modules which mustn't be imported before they're used
+    DEFERRED_MODULES = ['btcpy', 'bitcoinrpc', 'sympy', 'concurrent.futures']
+
+    SMALL_TX = ("from boltzmann.linker.txos_linker import TxosLinker;"
+                "linker = TxosLinker([('a', 10), ('b', 10)], [('A', 8), ('B', 2), ('C', 3), ('D', 7)], 0, 600);"
+                "linker.process(options=['PRECHECK', 'LINKABILITY'])")
+
+    def _run(self, args):
+        durations = []
+        for _ in range(self.NB_RUNS):
+            start = perf_counter()
+            proc = subprocess.run([sys.executable] + args, cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            durations.append(perf_counter() - start)
+            self.assertEqual(0, proc.returncode, proc.stderr)
+        return min(durations)
+
+    def _loaded_modules(self, statement):
+        code = "import sys;%s;print(','.join(sys.modules))" % statement
+        proc = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, stdout=subprocess.PIPE, universal_newlines=True)
+        return set(proc.stdout.strip().split(','))
+
+    def test_usage(self):
+        """Verify the duration of a run of ludwig which doesn't process any tx."""
+        baseline = self._run(self.BASELINE_USAGE)
+        duration = self._run([LUDWIG, '--help'])
+        self.assertLess(duration, self.BUDGET_USAGE * baseline, 'ludwig startup = %.3fs (baseline = %.3fs)' % (duration, baseline))
+
+    def test_small_tx(self):
+        """Verify the duration of a run processing a small tx."""
+        baseline = self._run(self.BASELINE_SMALL_TX)
+        duration = self._run(['-c', self.SMALL_TX])
+        self.assertLess(duration, self.BUDGET_SMALL_TX * baseline, 'small tx = %.3fs (baseline = %.3fs)' % (duration, baseline))
+
+    def test_deferred_imports(self):
+        """Verify that dependencies of unused code paths aren't imported."""
+        modules = self._loaded_modules('import boltzmann.ludwig')
+        for module in self.DEFERRED_MODULES + ['numpy', 'boltzmann.utils.tx_processor']:
+            self.assertNotIn(module, modules)
+        modules = self._loaded_modules(self.SMALL_TX)
+        for module in self.DEFERRED_MODULES:
+            self.assertNotIn(module, modules)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,6 @@ Created on 20170124
 import os
 import decimal
 from warnings import warn
-from bitcoinrpc.authproxy import AuthServiceProxy
 from boltzmann.utils.transaction import Transaction
 from boltzmann.utils.blockchain_data_wrapper import BlockchainDataWrapper
 
@@ -85,6 +84,9 @@ class BitcoindRPCWrapper(BlockchainDataWrapper):
     }
 
     def __init__(self):
+        # Deferred import (python-bitcoinrpc is only required by this provider)
+        from bitcoinrpc.authproxy import AuthServiceProxy
+
         rpc = dict()
         rpc['username'] = _get_env('BOLTZMANN_RPC_USERNAME')
         rpc['password'] = _get_env('BOLTZMANN_RPC_PASSWORD')
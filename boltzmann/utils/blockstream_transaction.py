@@ -5,10 +5,6 @@ Created on 20200404
 
 import boltzmann.utils.segwit_addr
 
-from btcpy.setup import setup
-from btcpy.structs.crypto import PublicKey
-from btcpy.structs.address import P2wpkhAddress, P2wshAddress
-from btcpy.structs.script import ScriptPubKey
 
 class Blockstream_Txo(object):
     '''
@@ -34,6 +30,8 @@ class Blockstream_Txo(object):
         self.tx_idx = -1
         self.isMainNet = mainnet
 
+        # Deferred import (btcpy is only required by this provider)
+        from btcpy.setup import setup
         if self.isMainNet == True:
             setup('mainnet')
         else:
@@ -0,0 +1,117 @@
+'''
+Created on 20261018
+@author: agent
+'''
+
+
+class DisjointSets(object):
+    '''
+    A class storing a partition of elements into disjoint sets (union-find)
+    Elements must be hashable.
+    Finds are done with path compression and unions by size,
+    so that a sequence of n operations runs in almost linear time.
+    '''
+
+    '''
+    INITIALIZATION
+    '''
+    def __init__(self, elements=[]):
+        '''
+        Constructor
+        Parameters:
+            elements = list of elements (each element is initially stored in its own set)
+        '''
+        # Parent of each element (roots are their own parent)
+        # Dictionary is ordered by insertion of elements
+        self._parents = {}
+        # Number of elements of the set of each root
+        self._sizes = {}
+        for e in elements:
+            self.add(e)
+
+
+    '''
+    PUBLIC METHODS
+    '''
+    def add(self, e):
+        '''
+        Adds an element in its own set (no-op if the element is already stored)
+        Parameters:
+            e = element
+        '''
+        if e not in self._parents:
+            self._parents[e] = e
+            self._sizes[e] = 1
+
+    def find(self, e):
+        '''
+        Returns the representative of the set storing an element (the element is added if it isn't stored yet)
+        Parameters:
+            e = element
+        '''
+        self.add(e)
+        root = e
+        while self._parents[root] != root:
+            root = self._parents[root]
+        # Path compression
+        while self._parents[e] != root:
+            self._parents[e], e = root, self._parents[e]
+        return root
+
+    def union(self, e1, e2):
+        '''
+        Merges the sets storing 2 elements
+        Returns the representative of the merged set
+        Parameters:
+            e1 = element
+            e2 = element
+        '''
+        r1 = self.find(e1)
+        r2 = self.find(e2)
+        if r1 == r2:
+            return r1
+        if self._sizes[r1] < self._sizes[r2]:
+            r1, r2 = r2, r1
+        self._parents[r2] = r1
+        self._sizes[r1] += self._sizes.pop(r2)
+        return r1
+
+    def union_all(self, elements):
+        '''
+        Merges the sets storing a collection of elements
+        Parameters:
+            elements = iterable of elements
+        '''
+        first = None
+        for e in elements:
+            if first is None:
+                first = e
+                self.add(e)
+            else:
+                self.union(first, e)
+
+    def groups(self, elements=None):
+        '''
+        Returns the list of sets
+        Sets are ordered by their first element in a given order of elements
+        Parameters:
+            elements = iterable of elements defining the order of sets
+                       (default = order of insertion of elements)
+        '''
+        if elements is None:
+            elements = list(self._parents.keys())
+        res = []
+        idx_roots = {}
+        for e in elements:
+            root = self.find(e)
+            if root not in idx_roots:
+                idx_roots[root] = len(res)
+                res.append(set())
+            res[idx_roots[root]].add(e)
+        return res
+
+    def __len__(self):
+        '''
+        Returns the number of sets
+        '''
+        return len(self._sizes)
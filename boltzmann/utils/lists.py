@@ -3,6 +3,7 @@ Created on 20160917
 Based on original works done in January 2015 for OXT
 @author: LaurentMT
 '''
+from boltzmann.utils.disjoint_sets import DisjointSets
 
 
 '''
@@ -14,23 +15,23 @@ def merge_sets(sets):
     Checks if sets from a list of sets share common elements
     and merge sets when common elements are detected
     Returns the list with merged sets
+    (merged sets are ordered by their first set in the list)
     Parameters:
         sets = list of sets
     '''
-    tmp_sets = list(sets)
-    merged = True
-    while merged:
-        merged = False
-        res = []
-        while tmp_sets:
-            current, rest = tmp_sets[0], tmp_sets[1:]
-            tmp_sets = []
-            for x in rest:
-                if x.isdisjoint(current):
-                    tmp_sets.append(x)
-                else:
-                    merged = True
-                    current |= x
-            res.append(current)
-        tmp_sets = res
-    return tmp_sets
+    dsets = DisjointSets()
+    for s in sets:
+        dsets.union_all(s)
+
+    res = []
+    idx_roots = {}
+    for s in sets:
+        if not s:
+            res.append(set())
+            continue
+        root = dsets.find(next(iter(s)))
+        if root not in idx_roots:
+            idx_roots[root] = len(res)
+            res.append(set())
+        res[idx_roots[root]] |= s
+    return res
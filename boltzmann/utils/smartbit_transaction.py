@@ -4,10 +4,6 @@ Inspired from https://github.com/blockchain/api-v1-client-python by https://gith
 @author: LaurentMT
 '''
 
-from btcpy.setup import setup
-from btcpy.structs.crypto import PublicKey
-from btcpy.structs.address import P2wpkhAddress, P2wshAddress
-from btcpy.structs.script import ScriptPubKey
 import boltzmann.utils.segwit_addr
 
 
@@ -35,6 +31,8 @@ class Smartbit_Txo(object):
         self.tx_idx = -1
         self.isMainNet = mainnet
 
+        # Deferred import (btcpy is only required by this provider)
+        from btcpy.setup import setup
         if self.isMainNet == True:
             setup('mainnet')
         else:
@@ -64,6 +62,9 @@ class Smartbit_Txo(object):
                             else:
                                 self.address = boltzmann.utils.segwit_addr.encode('tb', 0, bytes.fromhex(hex[4:]))
                         elif 'witness' in txo:
+                            from btcpy.structs.crypto import PublicKey
+                            from btcpy.structs.address import P2wpkhAddress, P2wshAddress
+                            from btcpy.structs.script import ScriptPubKey
                             witness = txo['witness']
                             if len(witness) >= 1:
                                 if txo['type'] == 'witness_v0_keyhash':
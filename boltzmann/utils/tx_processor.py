@@ -3,17 +3,39 @@ Created on 20160923
 Based on original works done for OXT in January 2015
 @author: LaurentMT
 '''
+import os
 import sys
+import json
+import numpy as np
+from math import comb
+from time import perf_counter
 from datetime import datetime
 from collections import defaultdict
-from sympy.core.symbol import symbols
-from sympy.functions.combinatorial.numbers import nC, bell
 from boltzmann.linker.txos_linker import TxosLinker
 from boltzmann.utils.lists import merge_sets
+from boltzmann.utils.disjoint_sets import DisjointSets
+from boltzmann.utils.tx_result import TxResult
 from boltzmann.utils.constants import NB_CMBN_PRFCT_CJ
 
 
-def process_tx(tx, options, max_duration, max_txos, max_cj_intrafees_ratio=0):
+# File storing the number of combinations of perfect coinjoins not stored in NB_CMBN_PRFCT_CJ
+# (directory may be set with the BOLTZMANN_CACHE_DIR environment variable)
+PRFCT_CJ_CACHE_FILE = os.path.join(os.environ.get('BOLTZMANN_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.boltzmann')),
+                                   'nb_cmbn_prfct_cj.json')
+
+# In-memory copy of the cache (loaded on first use)
+_prfct_cj_cache = None
+
+# Engines used by process_tx() in addition to the engines of the TxosLinker (@see TxResult.engine)
+PERFECT_CJ = 'PERFECT_CJ'
+ESTIMATE = 'ESTIMATE'
+
+# Default min duration (in seconds) of the txs stored in the slow log
+SLOW_THRESHOLD = 10
+
+
+def process_tx(tx, options, max_duration, max_txos, max_cj_intrafees_ratio=0, workers=1, checkpoint=None, hook=None, instrument=False,
+               slow_log=None, slow_threshold=SLOW_THRESHOLD, progress=None, cancel=None, nb_samples=None, max_block_size=None):
     '''
     Processes a transaction
     Parameters:
@@ -23,8 +45,26 @@ def process_tx(tx, options, max_duration, max_txos, max_cj_intrafees_ratio=0):
         max_txos                = max number of txos. Txs with more than max_txos inputs or outputs are not processed.
         max_cj_intrafees_ratio  = max intrafees paid by the taker of a coinjoined transaction. 
                                   Expressed as a percentage of the coinjoined amount.
+        workers                 = number of processes used for the computation of the linkability matrix
+        checkpoint              = path of a file used to save the state of the computation when max_duration is reached
+                                  and to resume it during a later run (@see TxosLinker, ValueError raised if workers > 1)
+        hook                    = function called with the results once the tx has been processed (e.g. logging of durations)
+        instrument              = records statistics of the phases of the linker (@see TxosLinker)
+        slow_log                = path of a file (json lines) storing the txs processed in more than slow_threshold seconds
+                                  (@see append_slow_log). Not used if None.
+        slow_threshold          = min duration (in seconds) of the txs stored in the slow log
+        progress                = function called periodically with the progress of the computation (@see TxosLinker)
+        cancel                  = cancellation token (e.g. threading.Event) interrupting the computation when set (@see TxosLinker)
+        nb_samples              = number of samples drawn by the estimator (default of the TxosEstimator if None)
+        max_block_size          = max number of inputs (or outputs) in a block sampled by the estimator
+                                  (default of the TxosEstimator if None)
+    Returns a TxResult (@see boltzmann.utils.tx_result.TxResult)
+    with complete = False if the computation has been interrupted (partial results if ANYTIME option is set)
+    and nb_cmbn_ci = confidence interval (95%) of nb_cmbn if results have been estimated
+    (ESTIMATE option set and tx with more than max_txos inputs or outputs), None otherwise.
+    Estimates are restricted to the sampled combinations if est_block_size isn't None (@see TxosEstimator)
     '''
-    t1 = datetime.now()
+    t1 = perf_counter()
 
     # Builds lists of filtered input/output txos (with generated ids)
     filtered_ins, map_ins = filter_txos(tx.inputs, 'I')
@@ -37,6 +77,7 @@ def process_tx(tx, options, max_duration, max_txos, max_cj_intrafees_ratio=0):
 
     # Sets default intrafees paid by participants (fee_received_by_maker, fees_paid_by_taker)
     intrafees = (0, 0)
+    linked_txos = []
 
     # Processes the transaction
     if (len(filtered_ins) <= 1) or (len(filtered_outs) == 1):
@@ -44,20 +85,15 @@ def process_tx(tx, options, max_duration, max_txos, max_cj_intrafees_ratio=0):
         # Txs having no input (coinbase) or only 1 input/output (null entropy)
         # When entropy = 0, all inputs and outputs are linked and matrix is filled with 1.
         # No need to build this matrix. Every caller should be able to manage that.
-        mat_lnk = None
-        nb_cmbn = 1
-        txo_ins = filtered_ins
-        txo_outs = filtered_outs
+        res = TxResult(None, None, 1, filtered_ins, filtered_outs, fees, intrafees)
 
     else:
 
-        # Initializes the TxosLinker for this tx
-        linker = TxosLinker(filtered_ins, filtered_outs, fees, max_duration, max_txos)
-
         # Computes a list of sets of inputs controlled by a same address
         linked_ins = get_linked_txos(filtered_ins, map_ins) if ('MERGE_INPUTS' in options) else []
         # Computes a list of sets of outputs controlled by a same address (not recommended)
         linked_outs = get_linked_txos(filtered_outs, map_outs) if ('MERGE_OUTPUTS' in options) else []
+        linked_txos = linked_ins + linked_outs
 
         # Computes intrafees to be used during processing
         if max_cj_intrafees_ratio > 0:
@@ -70,17 +106,287 @@ def process_tx(tx, options, max_duration, max_txos, max_cj_intrafees_ratio=0):
             if is_cj:
                 intrafees = compute_coinjoin_intrafees(nb_ptcpts, cj_amount, max_cj_intrafees_ratio)
 
-        # Computes entropy of the tx and txos linkability matrix
-        (mat_lnk, nb_cmbn, txo_ins, txo_outs) = linker.process(linked_ins+linked_outs, options, intrafees)
+        res = process_txos(filtered_ins, filtered_outs, fees, linked_txos, intrafees, options, max_duration, max_txos,
+                           workers, checkpoint, instrument, progress, cancel, nb_samples, max_block_size)
 
     # Computes tx efficiency (expressed as the ratio: nb_cmbn/nb_cmbn_perfect_cj)
-    efficiency = compute_wallet_efficiency(len(filtered_ins), len(filtered_outs), nb_cmbn)
+    res.efficiency = compute_wallet_efficiency(len(filtered_ins), len(filtered_outs), res.nb_cmbn)
+    res.duration = perf_counter() - t1
+    res.txid = getattr(tx, 'txid', None)
+
+    # Stores the data required to replay the processing of a slow tx
+    if (slow_log is not None) and (res.duration >= slow_threshold):
+        append_slow_log(slow_log, res, filtered_ins, filtered_outs, linked_txos, options, max_duration, max_txos)
 
     # Post processes results (replaces txo ids by bitcoin addresses)
-    txo_ins = post_process_txos(txo_ins, map_ins)
-    txo_outs = post_process_txos(txo_outs, map_outs)
-    print('Duration = %s' % str( (datetime.now() - t1).total_seconds()))       
-    return mat_lnk, nb_cmbn, txo_ins, txo_outs, fees, intrafees, efficiency
+    res.txo_ins = post_process_txos(res.txo_ins, map_ins)
+    res.txo_outs = post_process_txos(res.txo_outs, map_outs)
+    if hook is not None:
+        hook(res)
+    return res
+
+
+def process_txos(txo_ins, txo_outs, fees, linked_txos, intrafees, options, max_duration, max_txos, workers=1, checkpoint=None, instrument=False,
+                 progress=None, cancel=None, nb_samples=None, max_block_size=None):
+    '''
+    Computes the entropy and the linkability matrix of a tx defined by its filtered txos (@see filter_txos)
+    Selects the closed-form computation for perfect coinjoins, the TxosLinker otherwise,
+    and the TxosEstimator for large txs if the ESTIMATE option is set.
+    Returns a TxResult storing txos ids (efficiency, duration and txid aren't set)
+    Parameters:
+        txo_ins         = list of input txos (tuples (id, amount))
+        txo_outs        = list of output txos (tuples (id, amount))
+        fees            = fees of the tx
+        linked_txos     = list of sets of ids of txos controlled by a same entity
+        intrafees       = tuple (max intrafees received by a participant, max intrafees paid by a participant)
+        options         = options to be applied during processing
+        max_duration    = max duration allocated to processing of a single tx (in seconds)
+        max_txos        = max number of txos. Txs with more than max_txos inputs or outputs are not processed.
+        workers         = number of processes used for the computation of the linkability matrix
+        checkpoint      = path of a file used to save the state of an interrupted computation (@see TxosLinker)
+        instrument      = records statistics of the phases of the linker (@see TxosLinker)
+        progress        = function called periodically with the progress of the computation (@see TxosLinker)
+        cancel          = cancellation token interrupting the computation when set (@see TxosLinker)
+        nb_samples      = number of samples drawn by the estimator (default of the TxosEstimator if None)
+        max_block_size  = max number of inputs (or outputs) in a block sampled by the estimator (default of the TxosEstimator if None)
+    '''
+    engine = None
+    stats = None
+    nb_cmbn_ci = None
+    mat_dtrm = None
+    est_block_size = None
+
+    # Checks if the tx is a perfect coinjoin which can be processed without enumerating its combinations
+    is_prfct_cj = ('LINKABILITY' in options) and (not linked_txos) and (intrafees == (0, 0))\
+                  and not (('MERGE_FEES' in options) and (fees > 0))\
+                  and check_perfect_coinjoin(txo_ins, txo_outs)
+
+    if is_prfct_cj:
+        # Computes entropy of the tx and txos linkability matrix (closed-form)
+        mat_lnk, nb_cmbn = compute_link_matrix_perfect_cj(len(txo_ins), len(txo_outs))
+        res_ins = txo_ins
+        res_outs = txo_outs
+        complete = True
+        engine = PERFECT_CJ
+    else:
+        # Computes entropy of the tx and txos linkability matrix
+        linker = TxosLinker(txo_ins, txo_outs, fees, max_duration, max_txos, workers, checkpoint, instrument, progress, cancel)
+        (mat_lnk, nb_cmbn, res_ins, res_outs) = linker.process(linked_txos, options, intrafees)
+        complete = linker.complete
+        engine = linker.engine
+        stats = linker.stats
+        mat_dtrm = linker.mat_dtrm
+
+    # Estimates entropy of the tx and txos linkability matrix if the tx is too large to be processed
+    is_large = max(len(txo_ins), len(txo_outs)) > max_txos
+    if ('ESTIMATE' in options) and is_large and (mat_lnk is None) and (nb_cmbn == 0):
+        from boltzmann.linker.txos_estimator import TxosEstimator
+        nb_samples = nb_samples if nb_samples is not None else TxosEstimator.NB_SAMPLES
+        max_block_size = max_block_size if max_block_size is not None else TxosEstimator.MAX_BLOCK_SIZE
+        estimator = TxosEstimator(txo_ins, txo_outs, fees, max_duration, nb_samples, max_block_size, cancel=cancel)
+        (mat_lnk, nb_cmbn, res_ins, res_outs) = estimator.process(linked_txos, options, intrafees)
+        complete = estimator.complete
+        nb_cmbn_ci = estimator.nb_cmbn_ci
+        est_block_size = estimator.restricted_block_size
+        engine = ESTIMATE
+
+    return TxResult(None, mat_lnk, nb_cmbn, res_ins, res_outs, fees, intrafees, None, complete, nb_cmbn_ci, 0, engine, stats, mat_dtrm, est_block_size)
+
+
+def process_many(txs, workers=None, per_tx_timeout=None, options=['PRECHECK', 'LINKABILITY', 'MERGE_INPUTS'],
+                 max_duration=600, max_txos=12, max_cj_intrafees_ratio=0, ordered=False):
+    '''
+    Processes a batch of transactions with a pool of processes
+    Txs are pulled lazily from txs when a worker is idle. A worker processing a tx for more than per_tx_timeout
+    is killed (and replaced by a new worker), so that a tx can't block the batch even if the computation
+    doesn't check max_duration (e.g. enumeration of aggregates).
+    Yields a tuple (index, tx, results, error) per tx, with
+        index   = index of the tx in txs
+        results = TxResult returned by process_tx() or None if the tx couldn't be processed
+        error   = None, 'timeout' if the worker has been killed, or the description of the exception raised by process_tx()
+    Parameters:
+        txs                     = iterable of transactions to be processed (@see boltzmann.utils.transaction.Transaction)
+        workers                 = number of processes (default = number of cpus)
+        per_tx_timeout          = max duration (in seconds) before a worker processing a tx is killed (None = never killed)
+        options                 = options to be applied during processing
+        max_duration            = max duration allocated to processing of a single tx (in seconds, @see process_tx)
+        max_txos                = max number of txos. Txs with more than max_txos inputs or outputs are not processed.
+        max_cj_intrafees_ratio  = max intrafees paid by the taker of a coinjoined transaction.
+                                  Expressed as a percentage of the coinjoined amount.
+        ordered                 = yields results in the order of txs if True, in completion order otherwise
+    '''
+    # Deferred import (only required by batches)
+    import multiprocessing
+    from multiprocessing.connection import wait
+    from time import monotonic
+
+    nb_workers = max(1, workers if workers is not None else (os.cpu_count() or 1))
+    params = (options, max_duration, max_txos, max_cj_intrafees_ratio)
+    it_txs = enumerate(txs)
+
+    # Idle workers (processes, connections) and busy workers {connection: (process, index, tx, start)}
+    idle = []
+    busy = {}
+    # Results waiting for results of previous txs (ordered mode)
+    pending = {}
+    next_idx = 0
+    exhausted = False
+
+    def start_worker():
+        conn, child_conn = multiprocessing.Pipe()
+        # Workers aren't daemonic so that they can use TxosLinker with workers > 1
+        proc = multiprocessing.Process(target=_run_batch_worker, args=(child_conn, params))
+        proc.start()
+        child_conn.close()
+        return proc, conn
+
+    def stop_worker(proc, conn):
+        if proc.is_alive():
+            proc.kill()
+        proc.join()
+        conn.close()
+
+    try:
+        while True:
+            # Dispatches txs to idle workers
+            while (not exhausted) and (len(busy) < nb_workers):
+                try:
+                    idx, tx = next(it_txs)
+                except StopIteration:
+                    exhausted = True
+                    break
+                proc, conn = idle.pop() if idle else start_worker()
+                conn.send((idx, tx))
+                busy[conn] = (proc, idx, tx, monotonic())
+
+            if not busy:
+                break
+
+            # Waits for results or for the first deadline
+            timeout = None
+            if per_tx_timeout is not None:
+                first_start = min([start for (_, _, _, start) in busy.values()])
+                timeout = max(0, first_start + per_tx_timeout - monotonic())
+            ready = wait(list(busy.keys()), timeout)
+
+            completed = []
+            for conn in ready:
+                proc, idx, tx, _ = busy.pop(conn)
+                try:
+                    res, err = conn.recv()
+                    idle.append((proc, conn))
+                except (EOFError, OSError):
+                    # Worker died (e.g. out of memory)
+                    res, err = None, 'worker exited with code %s' % proc.exitcode
+                    stop_worker(proc, conn)
+                completed.append((idx, tx, res, err))
+
+            # Kills workers which have reached the timeout
+            if per_tx_timeout is not None:
+                now = monotonic()
+                for conn in [c for c, (_, _, _, start) in busy.items() if now - start >= per_tx_timeout]:
+                    proc, idx, tx, _ = busy.pop(conn)
+                    stop_worker(proc, conn)
+                    completed.append((idx, tx, None, 'timeout'))
+
+            if not ordered:
+                for item in completed:
+                    yield item
+            else:
+                for item in completed:
+                    pending[item[0]] = item
+                while next_idx in pending:
+                    yield pending.pop(next_idx)
+                    next_idx += 1
+    finally:
+        for conn, (proc, _, _, _) in busy.items():
+            stop_worker(proc, conn)
+        for proc, conn in idle:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            proc.join(1)
+            stop_worker(proc, conn)
+
+
+def _run_batch_worker(conn, params):
+    '''
+    Processes txs received from a connection until None is received (@see process_many)
+    Parameters:
+        conn   = connection to the parent process
+        params = tuple (options, max_duration, max_txos, max_cj_intrafees_ratio)
+    '''
+    options, max_duration, max_txos, max_cj_intrafees_ratio = params
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        _, tx = task
+        try:
+            res = process_tx(tx, options, max_duration, max_txos, max_cj_intrafees_ratio)
+            conn.send((res, None))
+        except Exception as err:
+            conn.send((None, '%s: %s' % (type(err).__name__, err)))
+    conn.close()
+
+
+def append_slow_log(slow_log, res, txo_ins, txo_outs, linked_txos, options, max_duration, max_txos):
+    '''
+    Appends the record of a slow tx to the slow log (one json object per line)
+    A record stores the inputs of process_txos() (so that the processing can be replayed offline)
+    and the results of the processing (duration, engine, number of combinations, statistics of the phases).
+    Parameters:
+        slow_log        = path of the slow log
+        res             = results of the processing (@see TxResult)
+        txo_ins         = list of filtered input txos (tuples (id, amount))
+        txo_outs        = list of filtered output txos (tuples (id, amount))
+        linked_txos     = list of sets of ids of txos controlled by a same entity
+        options         = options applied during processing
+        max_duration    = max duration allocated to processing of a single tx (in seconds)
+        max_txos        = max number of txos
+    '''
+    record = {
+        'txid': res.txid,
+        'date': datetime.now().isoformat(),
+        'inputs': [list(txo) for txo in txo_ins],
+        'outputs': [list(txo) for txo in txo_outs],
+        'fees': res.fees,
+        'linked_txos': [sorted(s) for s in linked_txos],
+        'intrafees': list(res.intrafees),
+        'options': list(options),
+        'max_duration': max_duration,
+        'max_txos': max_txos,
+        'engine': res.engine,
+        'duration': res.duration,
+        'nb_cmbn': int(res.nb_cmbn),
+        'complete': res.complete,
+        'stats': res.stats
+    }
+    with open(slow_log, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def read_slow_log(slow_log):
+    '''
+    Reads the records stored in a slow log (@see append_slow_log)
+    Yields the records (dictionaries) with txos converted to tuples and linked txos converted to sets
+    Parameters:
+        slow_log = path of the slow log
+    '''
+    with open(slow_log, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            record['inputs'] = [tuple(txo) for txo in record['inputs']]
+            record['outputs'] = [tuple(txo) for txo in record['outputs']]
+            record['linked_txos'] = [set(s) for s in record['linked_txos']]
+            record['intrafees'] = tuple(record['intrafees'])
+            yield record
 
 
 def filter_txos(txos, prefix):
@@ -114,23 +420,15 @@ def get_linked_txos(txos, map_id_addr):
         txos         = list of txos (tuples (txo_id, amount))
         map_id_addr  = dictionary mapping txo_ids to addresses
     '''
-    linked_txos = []
-
+    dsets = DisjointSets()
+    first_ids = {}
     for txo in txos:
-        s_ins = { txo[0] }
-        s_addr = { map_id_addr[txo[0]] }         
-        # Checks if this set intersects with some set previously found
-        for entry in linked_txos:
-            k = entry[0]
-            v = entry[1]
-            if k & s_addr:
-                # If an intersection is found, merges the 2 sets and removes previous set from linked_txos
-                s_ins |= v
-                s_addr |= k
-                linked_txos.remove(entry)
-        linked_txos.append((s_addr, s_ins))
-
-    return [i[1] for i in linked_txos if len(i[1]) > 1]
+        txo_id = txo[0]
+        dsets.union(first_ids.setdefault(map_id_addr[txo_id], txo_id), txo_id)
+
+    # Sets are ordered by their last txo
+    linked_txos = dsets.groups(reversed([txo[0] for txo in txos]))[::-1]
+    return [s for s in linked_txos if len(s) > 1]
 
 
 def post_process_txos(txos, map_id_addr):
@@ -205,6 +503,64 @@ def compute_coinjoin_intrafees(nb_ptcpts, cj_amount, prct_max):
 
 
 
+def check_perfect_coinjoin(txo_ins, txo_outs):
+    '''
+    Checks if a transaction is a perfect coinjoin (@see compute_cmbns_perfect_cj)
+    with fees evenly paid by the inputs (if #outputs >= #inputs) or by the outputs (if #inputs > #outputs)
+    and lower than the value of a single txo of this side of the tx.
+    Then, a block of inputs and outputs is valid only if its ratio #outputs/#inputs is the ratio of the tx.
+    Returns True if the transaction is a perfect coinjoin, False otherwise
+    Parameters:
+        txo_ins  = list of inputs valves (tuples (tiid, amount))
+        txo_outs = list of outputs valves (tuples (tiid, amount))
+    '''
+    val_ins = set([txo[1] for txo in txo_ins])
+    val_outs = set([txo[1] for txo in txo_outs])
+    if (len(val_ins) != 1) or (len(val_outs) != 1):
+        return False
+
+    nb_i = len(txo_ins)
+    nb_o = len(txo_outs)
+    val_i = val_ins.pop()
+    val_o = val_outs.pop()
+    fees = nb_i * val_i - nb_o * val_o
+    if (fees < 0) or (val_i <= 0) or (val_o <= 0):
+        return False
+
+    if nb_o >= nb_i:
+        return (nb_o % nb_i == 0) and (fees < val_o)
+    else:
+        return (nb_i % nb_o == 0) and (fees < val_i)
+
+
+def compute_link_matrix_perfect_cj(nb_i, nb_o):
+    '''
+    Computes the linkability matrix of a perfect coinjoin (@see check_perfect_coinjoin)
+    All cells of the matrix are equal. Each cell is the number of combinations
+    for which the block storing a given input also stores a given output.
+    Returns a tuple (linkability matrix, number of combinations)
+    Parameters:
+        nb_i = number of inputs
+        nb_o = number of outputs
+    '''
+    # Number of txos on the side with less txos (n) and ratio between both sides (r)
+    n = min(nb_i, nb_o)
+    m = max(nb_i, nb_o)
+    r = m // n
+
+    nb_cmbn = compute_cmbns_perfect_cj(n, m)
+
+    # Sums over the size of the block (a txos among n, r*a txos among m) storing the given txos
+    nb_lnk = 0
+    for a in range(1, n+1):
+        nb_cmbn_rest = compute_cmbns_perfect_cj(n-a, m-r*a) if a < n else 1
+        nb_lnk += comb(n-1, a-1) * comb(m-1, r*a-1) * nb_cmbn_rest
+
+    dtype = np.int64 if nb_cmbn < 2**63 else object
+    mat_lnk = np.full((nb_o, nb_i), nb_lnk, dtype=dtype)
+    return mat_lnk, nb_cmbn
+
+
 '''
 Computation of wallet efficiency
 (@see https://gist.github.com/LaurentMT/e758767ca4038ac40aaf)
@@ -281,15 +637,15 @@ def compute_cmbns_perfect_cj(nb_i, nb_o):
         nb_o = number of outputs
 
     Notes:
-    Since all inputs have the same amount
-    we can use exponential Bell polynomials to retrieve
-    the number and structure of partitions for the set of inputs.
-
-    Since all outputs have the same amount
-    we can use a direct computation of combinations of k outputs among n.
+    Since all inputs have the same amount and all outputs have the same amount,
+    each block of a combination stores a inputs and ratio*a outputs.
+    Let N(k) be the number of combinations of a perfect coinjoin with k inputs and ratio*k outputs.
+    The block storing the first input is defined by a-1 inputs among k-1
+    and ratio*a outputs among ratio*k. Thus:
+    N(k) = sum(C(k-1, a-1) * C(ratio*k, ratio*a) * N(k-a) for a in [1, k]), with N(0) = 1
+    Values are cached on disk (@see PRFCT_CJ_CACHE_FILE).
     '''
     # Reverses inputs & outputs if nb_i > nb_o
-    # (required for the use of EBP)
     if nb_i > nb_o:
         nb_i, nb_o = nb_o, nb_i
 
@@ -304,37 +660,50 @@ def compute_cmbns_perfect_cj(nb_i, nb_o):
     elif (nb_i <= 20) and (nb_o <= 60):
         return NB_CMBN_PRFCT_CJ[(nb_i, nb_o)]
 
-    # Initializes the total number of combinations for the tx
-    nb_cmbn = 0
-
-    # Computes the ratio between #outputs and #inputs
-    ratio_o_i = float(nb_o) / nb_i
-
-    # Iterates over partioning of inputs in k_i parts
-    for k_i in range(1, nb_i+1):
-        parts_k_i = bell(nb_i, k_i, symbols('x:%d' % (nb_i+1))[1:])
-
-        # Splits the Bell polynomial in its basic components
-        dict_coeffs = parts_k_i.as_coefficients_dict()
-
-        for monomial, coef_monomial in dict_coeffs.items():
-            nb_cmbn_monomial = coef_monomial
+    # Extends the cached sequence N(k) for the ratio between #outputs and #inputs
+    ratio_o_i = nb_o // nb_i
+    cache = _load_prfct_cj_cache()
+    nb_cmbns = cache.setdefault(ratio_o_i, [1])
+    if len(nb_cmbns) <= nb_i:
+        for k in range(len(nb_cmbns), nb_i+1):
+            nb_cmbn = 0
+            for a in range(1, k+1):
+                nb_cmbn += comb(k-1, a-1) * comb(ratio_o_i*k, ratio_o_i*a) * nb_cmbns[k-a]
+            nb_cmbns.append(nb_cmbn)
+        _save_prfct_cj_cache(cache)
 
-            # Splits the monomial in its basic blocks
-            # and extracts the exponent for each block
-            dict_exp = monomial.as_powers_dict()
+    return nb_cmbns[nb_i]
 
-            # Initializes number of remaining free outputs  
-            # for computation of output combinations
-            nb_free_o = nb_o
 
-            for block, block_exp in dict_exp.items():
-                block_nb_i = int(str(block)[1:])
-                block_nb_o = int(ratio_o_i * block_nb_i)
-                for _ in range(1, block_exp+1):
-                    nb_cmbn_monomial *= nC(symbols('x:%d' % nb_free_o), block_nb_o)
-                    nb_free_o -= block_nb_o
-
-            nb_cmbn += nb_cmbn_monomial
-
-    return nb_cmbn
+def _load_prfct_cj_cache():
+    '''
+    Loads the cache storing the number of combinations of perfect coinjoins
+    Returns a dictionary {ratio nb_o/nb_i: list storing the number of combinations for k inputs (index k)}
+    '''
+    global _prfct_cj_cache
+    if _prfct_cj_cache is None:
+        _prfct_cj_cache = {}
+        try:
+            with open(PRFCT_CJ_CACHE_FILE, 'r') as f:
+                _prfct_cj_cache = {int(ratio): [int(n) for n in nb_cmbns] for ratio, nb_cmbns in json.load(f).items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            # Missing or corrupted cache. Values are computed again.
+            pass
+    return _prfct_cj_cache
+
+
+def _save_prfct_cj_cache(cache):
+    '''
+    Saves the cache storing the number of combinations of perfect coinjoins
+    Failures are ignored (the cache is only an optimization)
+    Parameters:
+        cache = dictionary {ratio nb_o/nb_i: list storing the number of combinations for k inputs (index k)}
+    '''
+    try:
+        os.makedirs(os.path.dirname(PRFCT_CJ_CACHE_FILE), exist_ok=True)
+        tmp_file = '%s.%d.tmp' % (PRFCT_CJ_CACHE_FILE, os.getpid())
+        with open(tmp_file, 'w') as f:
+            json.dump({str(ratio): nb_cmbns for ratio, nb_cmbns in cache.items()}, f)
+        os.replace(tmp_file, PRFCT_CJ_CACHE_FILE)
+    except OSError:
+        pass
@@ -0,0 +1,68 @@
+'''
+Created on 20261018
+@author: agent
+'''
+
+
+class TxResult(object):
+    '''
+    A class storing the results of the processing of a single tx (@see tx_processor.process_tx)
+    Attributes:
+        txid (str): Txid of the transaction (None if not available)
+        mat_lnk (numpy.array): Linkability matrix (rows = outputs, columns = inputs).
+            None if the entropy is null or if the tx hasn't been processed.
+        nb_cmbn (int): Number of combinations (0 if the tx hasn't been processed)
+        txo_ins (List[tuple]): Input txos (tuples (address, amount))
+        txo_outs (List[tuple]): Output txos (tuples (address, amount))
+        fees (int): Fees of the transaction
+        intrafees (tuple): Max intrafees received/paid by a participant
+        efficiency (float): Wallet efficiency (ratio nb_cmbn / nb_cmbn of the closest perfect coinjoin)
+        complete (bool): False if the computation has been interrupted (partial results)
+        nb_cmbn_ci (tuple): Confidence interval (95%) of nb_cmbn if results have been estimated, None otherwise
+        est_block_size (int): Max number of inputs (or outputs) of the blocks of the combinations sampled by the estimator
+            if the estimates are restricted to these combinations, None otherwise (@see TxosEstimator.restricted_block_size)
+        duration (float): Duration of the processing (in seconds)
+        engine (str): Engine used for the computation of the linkability matrix
+            (@see TxosLinker.engine, PERFECT_CJ, ESTIMATE or None if nothing was computed)
+        stats (dict): Statistics of the phases of the linker if instrumentation is enabled, None otherwise
+            (@see TxosLinker.stats)
+        mat_dtrm (numpy.array): Deterministic links confirmed by the precheck (same shape as mat_lnk, booleans).
+            None if the precheck hasn't been applied (@see TxosLinker.mat_dtrm)
+    '''
+
+    __slots__ = ('txid', 'mat_lnk', 'nb_cmbn', 'txo_ins', 'txo_outs', 'fees', 'intrafees',
+                 'efficiency', 'complete', 'nb_cmbn_ci', 'duration', 'engine', 'stats', 'mat_dtrm', 'est_block_size')
+
+    def __init__(self, txid=None, mat_lnk=None, nb_cmbn=0, txo_ins=[], txo_outs=[], fees=0, intrafees=(0, 0),
+                 efficiency=None, complete=True, nb_cmbn_ci=None, duration=0, engine=None, stats=None, mat_dtrm=None, est_block_size=None):
+        self.txid = txid
+        self.mat_lnk = mat_lnk
+        self.nb_cmbn = nb_cmbn
+        self.txo_ins = txo_ins
+        self.txo_outs = txo_outs
+        self.fees = fees
+        self.intrafees = intrafees
+        self.efficiency = efficiency
+        self.complete = complete
+        self.nb_cmbn_ci = nb_cmbn_ci
+        self.duration = duration
+        self.engine = engine
+        self.stats = stats
+        self.mat_dtrm = mat_dtrm
+        self.est_block_size = est_block_size
+
+    def __iter__(self):
+        '''
+        Iterates over the values of the tuple formerly returned by process_tx
+        (mat_lnk, nb_cmbn, txo_ins, txo_outs, fees, intrafees, efficiency)
+        Other results are only available as attributes.
+        '''
+        return iter((self.mat_lnk, self.nb_cmbn, self.txo_ins, self.txo_outs, self.fees,
+                     self.intrafees, self.efficiency))
+
+    def __str__(self):
+        return "{{ 'txid': {0}, 'nb_cmbn': {1}, 'complete': {2}, 'engine': {3}, 'duration': {4} }}".format(
+            self.txid, self.nb_cmbn, self.complete, self.engine, self.duration)
+
+    def __repr__(self):
+        return self.__str__()
@@ -29,8 +29,6 @@ setup(
         'numpy >= 1.8.0',
         'sortedcontainers',
         'python-bitcoinrpc',
-        'mpmath',
-        'sympy',
         'chainside-btcpy >= 0.5.1'
     ]
 )